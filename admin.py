@@ -0,0 +1,60 @@
+"""
+Admin endpoints shared by both chatbot servers: the /admin/profiling routes
+that control REQUEST_PROFILER (see profiling.py). Include with
+app.include_router(admin_router).
+"""
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel
+from typing import Optional
+from profiling import REQUEST_PROFILER, is_admin
+
+admin_router = APIRouter(prefix="/admin")
+
+class ProfilingSession(BaseModel):
+    # Fraction of requests to profile, for `duration` seconds and/or `max_requests` requests
+    sample_rate: float = 1.0
+    duration: Optional[float] = None
+    max_requests: Optional[int] = None
+
+def require_admin(token):
+    """Profiling endpoints don't exist without ADMIN_TOKEN and need the X-Admin-Token header"""
+    if not REQUEST_PROFILER.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@admin_router.get("/profiling")
+async def profiling_status(x_admin_token: Optional[str] = Header(None)):
+    """Whether a profiling session is running and how many requests it sampled"""
+    require_admin(x_admin_token)
+    return REQUEST_PROFILER.status()
+
+@admin_router.post("/profiling")
+async def start_profiling(session: ProfilingSession, x_admin_token: Optional[str] = Header(None)):
+    """Profile a sample of chat requests until stopped, `duration` elapses or `max_requests` are sampled"""
+    require_admin(x_admin_token)
+    try:
+        return REQUEST_PROFILER.start(session.sample_rate, session.duration, session.max_requests)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@admin_router.delete("/profiling")
+async def stop_profiling(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    return REQUEST_PROFILER.stop()
+
+@admin_router.get("/profiling/report")
+async def profiling_report(format: str = "text", sort: str = "cumulative", limit: int = 50,
+                           x_admin_token: Optional[str] = Header(None)):
+    """Merged profile: pstats listing ("text"), flamegraph input ("collapsed") or a pstats dump ("pstats")"""
+    require_admin(x_admin_token)
+    try:
+        report = REQUEST_PROFILER.report(format, sort, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if format == "pstats":
+        return Response(report, media_type="application/octet-stream",
+                        headers={"Content-Disposition": 'attachment; filename="profile.pstats"'})
+    return PlainTextResponse(report)
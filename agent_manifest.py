@@ -0,0 +1,47 @@
+"""
+Per-agent manifest stored next to the agent's vector store.
+
+The manifest records how the store was built (source file, chunking settings,
+counts) and the precomputed document digest served without the LLM.
+"""
+
+import json
+import os
+import time
+
+MANIFEST_FILENAME = "agent_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def agent_store_path(vector_stores_dir, agent_name):
+    """Directory of an agent's Chroma store"""
+    return os.path.join(vector_stores_dir, f"chroma_db_{agent_name.replace(' ', '_').replace('-', '_')}")
+
+
+def manifest_path(vectorstore_path):
+    return os.path.join(vectorstore_path, MANIFEST_FILENAME)
+
+
+def load_manifest(vectorstore_path):
+    """Return the manifest dict, or None if the store has no (readable) manifest"""
+    path = manifest_path(vectorstore_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(vectorstore_path, manifest):
+    """Atomically write the manifest so concurrent readers never see a partial file"""
+    if not os.path.exists(vectorstore_path):
+        os.makedirs(vectorstore_path)
+    manifest = dict(manifest, version=MANIFEST_VERSION, updated_at=time.time())
+    path = manifest_path(vectorstore_path)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return manifest
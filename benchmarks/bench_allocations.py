@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Allocation benchmark for retrieval results: bytes and blocks allocated per
+retrieved chunk when hits are held as ChunkRecords (text as offsets into the
+page buffer, interned metadata keys) versus a plain dict with its own text
+and metadata copy, and versus LangChain Documents when langchain_core is
+installed.
+
+Uses tracemalloc on synthetic chunk hits, so it runs without Chroma or an
+OpenAI key.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+# Add parent directory to path to import chunk_store
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunk_store import ChunkRecord, PageBuffer
+from harness import environment, write_results
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WORDS = [
+    "student", "course", "credit", "report", "project", "deadline", "advisor", "grade",
+    "module", "lecture", "exam", "policy", "submission", "schedule", "requirement",
+    "internship", "thesis", "laboratory", "company", "evaluation", "semester",
+]
+
+def build_hits(args):
+    """Synthetic pages plus Chroma-style hit metadata with chunk offsets"""
+    rng = random.Random(args.seed)
+    pages = []
+    for _ in range(args.pages):
+        words = [rng.choice(WORDS) for _ in range(args.page_words)]
+        pages.append(" ".join(words))
+    hits = []
+    for _ in range(args.hits):
+        page = rng.randrange(len(pages))
+        start = rng.randrange(max(1, len(pages[page]) - args.chunk_chars))
+        hits.append({
+            "source": "documents/handbook.pdf",
+            "page": page,
+            "start_index": start,
+            "length": len(pages[page][start:start + args.chunk_chars]),
+            "simhash": "%016x" % rng.getrandbits(64),
+        })
+    return pages, hits
+
+def _stored_text(pages, metadata):
+    # A fresh string, as the store returns when "documents" is included in a query
+    start = metadata["start_index"]
+    return pages[metadata["page"]][start:start + metadata["length"]]
+
+def _as_dict(metadata, pages, buffer):
+    return {"page_content": _stored_text(pages, metadata), "metadata": dict(metadata)}
+
+def _as_record(metadata, pages, buffer):
+    return ChunkRecord.from_metadata(metadata, buffer)
+
+def _as_document(metadata, pages, buffer):
+    from langchain_core.documents import Document
+
+    return Document(page_content=_stored_text(pages, metadata), metadata=dict(metadata))
+
+def measure(build, hits, pages, buffer):
+    """Bytes and blocks still allocated per result once all hits are converted"""
+    build(hits[0], pages, buffer)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    results = [build(metadata, pages, buffer) for metadata in hits]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    return {
+        "bytes_per_result": sum(stat.size_diff for stat in stats) / len(results),
+        "blocks_per_result": sum(stat.count_diff for stat in stats) / len(results),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--page-words", type=int, default=600)
+    parser.add_argument("--hits", type=int, default=5000, help="retrieval results to convert")
+    parser.add_argument("--chunk-chars", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results", "allocations.json"))
+    args = parser.parse_args()
+
+    print("🏁 Retrieval Result Allocation Benchmark")
+    print("="*50)
+    pages, hits = build_hits(args)
+    buffer = PageBuffer(pages)
+
+    builders = {"dict": _as_dict, "record": _as_record}
+    try:
+        import langchain_core.documents  # noqa: F401
+        builders["document"] = _as_document
+    except ImportError:
+        print("langchain_core not installed, skipping the Document baseline")
+
+    metrics = {name: measure(build, hits, pages, buffer) for name, build in builders.items()}
+    for name, stats in metrics.items():
+        print(f"{name:>10}: {stats['bytes_per_result']:.0f} B, {stats['blocks_per_result']:.1f} blocks per result")
+    baseline = metrics.get("document", metrics["dict"])
+    metrics["reduction"] = {
+        "bytes": 1 - metrics["record"]["bytes_per_result"] / baseline["bytes_per_result"],
+        "blocks": 1 - metrics["record"]["blocks_per_result"] / baseline["blocks_per_result"],
+    }
+    print(f"{'reduction':>10}: {metrics['reduction']['bytes']:.0%} bytes, "
+          f"{metrics['reduction']['blocks']:.0%} blocks vs {'document' if 'document' in metrics else 'dict'}")
+
+    write_results(args.output, {
+        "environment": environment(),
+        "config": vars(args),
+        "metrics": metrics,
+    })
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for speculative retrieval: sequential condense -> retrieve ->
+generate versus retrieval overlapped with condensing.
+
+Uses stub components with realistic (scaled) delays, so it runs without
+LangChain or an OpenAI key.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path to import retrieval_pipeline
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval_pipeline import SpeculativeRetrievalPipeline
+from harness import environment, latency_summary, write_results
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (raw follow-up, what the condense LLM turns it into)
+FOLLOW_UPS = [
+    ("What are the internship requirements?", "What are the requirements for the internship?"),
+    ("When is the final report deadline?", "When is the final report deadline?"),
+    ("How many credits is the thesis course?", "How many credits is the thesis course worth?"),
+    ("What about its deadline?", "What is the deadline for submitting the internship report?"),
+    ("And who approves it?", "Who approves the internship company selection?"),
+    ("Which companies are allowed for the internship?", "Which companies are allowed for the internship?"),
+    ("Is the lab exam open book?", "Is the laboratory exam open book?"),
+    ("What if I miss it?", "What happens if a student misses the laboratory exam?"),
+]
+
+def _delay(rng, mean, scale):
+    # Log-normal jitter gives the long right tail seen on real API calls
+    time.sleep(mean * scale * rng.lognormvariate(0, 0.25))
+
+def build_pipeline(args, speculative, seed):
+    rng = random.Random(seed)
+    rewrites = dict(FOLLOW_UPS)
+    
+    def condense(question, chat_history, callbacks):
+        _delay(rng, args.condense_ms / 1000, args.scale)
+        return rewrites[question]
+    
+    def retrieve(question, callbacks):
+        _delay(rng, args.retrieve_ms / 1000, args.scale)
+        return [f"chunk for {question}"]
+    
+    def generate(question, documents, chat_history, callbacks):
+        _delay(rng, args.generate_ms / 1000, args.scale)
+        return f"answer to {question}"
+    
+    return SpeculativeRetrievalPipeline(condense, retrieve, generate, speculative=speculative)
+
+def run(args, speculative):
+    pipeline = build_pipeline(args, speculative, seed=args.seed)
+    history = ["previous turn"]
+    samples, hits = [], 0
+    for i in range(args.requests):
+        question = FOLLOW_UPS[i % len(FOLLOW_UPS)][0]
+        start = time.perf_counter()
+        result = pipeline({"question": question, "chat_history": history})
+        samples.append((time.perf_counter() - start) / args.scale)
+        hits += bool(result["speculative_hit"])
+    summary = latency_summary(samples)
+    summary["speculative_hit_rate"] = hits / args.requests
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=80)
+    parser.add_argument("--condense-ms", type=float, default=400, help="mean condense LLM latency")
+    parser.add_argument("--retrieve-ms", type=float, default=150, help="mean embedding + vector search latency")
+    parser.add_argument("--generate-ms", type=float, default=900, help="mean answer LLM latency")
+    parser.add_argument("--scale", type=float, default=0.1, help="shrink all delays to keep the run short")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results", "speculative.json"))
+    args = parser.parse_args()
+    
+    print("🏁 Speculative Retrieval Benchmark")
+    print("="*50)
+    sequential = run(args, speculative=False)
+    speculative = run(args, speculative=True)
+    
+    reduction = {
+        pct: 1 - speculative[f"{pct}_ms"] / sequential[f"{pct}_ms"]
+        for pct in ("p50", "p95")
+    }
+    for name, stats in (("sequential", sequential), ("speculative", speculative)):
+        print(f"{name:>12}: p50 {stats['p50_ms']:.0f} ms, p95 {stats['p95_ms']:.0f} ms")
+    print(f"{'reduction':>12}: p50 {reduction['p50']:.0%}, p95 {reduction['p95']:.0%} "
+          f"(speculative hit rate {speculative['speculative_hit_rate']:.0%})")
+    print("(latencies rescaled to the unscaled delays)")
+    
+    write_results(args.output, {
+        "environment": environment(),
+        "config": vars(args),
+        "metrics": {"sequential": sequential, "speculative": speculative, "reduction": reduction},
+    })
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: import cost of the app modules in a fresh interpreter,
+measured with `python -X importtime`, plus which heavy packages (LangChain,
+Chroma, OpenAI, pypdf) each import pulls in.
+
+Each module is imported in its own subprocess, so nothing is cached between
+runs. Compare against a stored baseline to catch a heavy import creeping back
+into module load.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from harness import environment, percentile, report_comparison, write_results
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+MODULES = ["multi_agent_chatbot", "chatbot", "main_multi_agent", "main"]
+HEAVY_PACKAGES = ["langchain", "langchain_core", "langchain_community", "langchain_openai", "chromadb", "openai", "pypdf"]
+
+PROBE = (
+    "import importlib, json, sys; importlib.import_module(sys.argv[1]); "
+    "print(json.dumps(sorted({m.split('.')[0] for m in sys.modules} & set(sys.argv[2:]))))"
+)
+
+def parse_importtime(stderr):
+    """[(self_us, cumulative_us, depth, module)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+def import_once(module):
+    """Import module in a fresh interpreter; returns (importtime rows, heavy packages loaded, wall seconds)"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE, module] + HEAVY_PACKAGES,
+        cwd=REPO_DIR, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        lines = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(lines[-1] if lines else f"exit code {proc.returncode}")
+    return parse_importtime(proc.stderr), json.loads(proc.stdout.strip().splitlines()[-1]), wall
+
+def bench_module(module, repeats, top):
+    """Median import cost of one module, its heaviest top-level packages and the heavy packages it loads"""
+    import_samples, wall_samples, by_package = [], [], {}
+    heavy = []
+    for _ in range(repeats):
+        rows, heavy, wall = import_once(module)
+        wall_samples.append(wall)
+        import_samples.append(sum(self_us for self_us, _, _, _ in rows) / 1e6)
+        for self_us, _, _, name in rows:
+            package = name.split(".")[0]
+            by_package[package] = by_package.get(package, 0) + self_us / repeats
+    heaviest = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "import_ms": percentile(import_samples, 50) * 1000,
+        "process_ms": percentile(wall_samples, 50) * 1000,
+        "heavy_packages_count": len(heavy),
+        "heavy_packages": heavy,
+        "heaviest": {package: us / 1000 for package, us in heaviest},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="heaviest packages to report per module")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results", "startup.json"))
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "startup_baseline.json"))
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    print("🏁 Startup Import Benchmark")
+    print("="*50)
+    # A bare interpreter, so module costs can be read relative to it
+    interpreter_rows, _, _ = import_once("sys")
+    interpreter_ms = sum(self_us for self_us, _, _, _ in interpreter_rows) / 1000
+    print(f"{'interpreter':>20}: {interpreter_ms:.0f} ms of imports before any app module")
+    metrics, errors = {"interpreter": {"import_ms": interpreter_ms}}, {}
+    for module in args.modules:
+        try:
+            stats = bench_module(module, args.repeats, args.top)
+        except RuntimeError as e:
+            errors[module] = str(e)
+            print(f"{module:>20}: could not import ({e})")
+            continue
+        metrics[module] = stats
+        heavy = ", ".join(stats["heavy_packages"]) or "none"
+        print(f"{module:>20}: import {stats['import_ms']:.0f} ms, process {stats['process_ms']:.0f} ms, heavy: {heavy}")
+
+    results = {
+        "environment": environment(),
+        "config": {key: value for key, value in vars(args).items() if key != "update_baseline"},
+        "metrics": metrics,
+        "errors": errors,
+    }
+    write_results(args.output, results)
+    if args.update_baseline:
+        write_results(args.baseline, results)
+        return 0
+    return 0 if report_comparison(results, args.baseline, args.tolerance) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
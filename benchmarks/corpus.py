@@ -0,0 +1,70 @@
+"""
+Synthetic PDF corpora for the offline benchmarks, built the same way as generate_pdf.py
+"""
+
+import os
+import random
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate
+
+TOPICS = [
+    "internship", "curriculum", "assessment", "laboratory", "thesis", "registration",
+    "scholarship", "semester", "network", "database", "algorithm", "security",
+]
+
+WORDS = [
+    "student", "course", "credit", "report", "project", "deadline", "advisor", "grade",
+    "module", "lecture", "exam", "policy", "submission", "schedule", "requirement",
+    "document", "section", "example", "system", "process", "result", "method", "data",
+    "analysis", "design", "review", "practice", "training", "company", "evaluation",
+]
+
+def _sentence(rng, topic):
+    words = rng.sample(WORDS, rng.randint(8, 14))
+    words.insert(rng.randint(0, len(words)), topic)
+    return " ".join(words).capitalize() + "."
+
+def generate_pdf(path, pages=5, paragraphs_per_page=4, seed=0):
+    """Generate one deterministic multi-page PDF and return its path"""
+    rng = random.Random(seed)
+    topic = TOPICS[seed % len(TOPICS)]
+    styles = getSampleStyleSheet()
+    story = [Paragraph(f"{topic.capitalize()} Handbook {seed}", styles['Title'])]
+    
+    for page in range(pages):
+        story.append(Paragraph(f"Section {page + 1}: {topic} {rng.choice(WORDS)}", styles['Heading1']))
+        for _ in range(paragraphs_per_page):
+            text = " ".join(_sentence(rng, topic) for _ in range(rng.randint(4, 7)))
+            story.append(Paragraph(text, styles['Normal']))
+        if page < pages - 1:
+            story.append(PageBreak())
+    
+    SimpleDocTemplate(path, pagesize=letter).build(story)
+    return path
+
+def generate_corpus(documents_dir, num_documents=3, pages=5, paragraphs_per_page=4):
+    """Generate a corpus of synthetic PDFs, reusing files that already exist"""
+    if not os.path.exists(documents_dir):
+        os.makedirs(documents_dir)
+    
+    paths = []
+    for i in range(num_documents):
+        path = os.path.join(documents_dir, f"synthetic_{i:03d}.pdf")
+        if not os.path.exists(path):
+            generate_pdf(path, pages=pages, paragraphs_per_page=paragraphs_per_page, seed=i)
+        paths.append(path)
+    return paths
+
+def sample_questions(num_documents=3):
+    """Questions mentioning each synthetic document's topic"""
+    questions = []
+    for i in range(num_documents):
+        topic = TOPICS[i % len(TOPICS)]
+        questions.extend([
+            "What is this document about?",
+            f"What are the {topic} requirements?",
+            f"When is the {topic} report deadline?",
+        ])
+    return questions
@@ -0,0 +1,98 @@
+"""
+Shared helpers for the benchmark scripts: timing, percentiles, result files and baseline comparison
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+
+def percentile(values, pct):
+    """Linear-interpolated percentile (pct in 0..100) of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def latency_summary(samples):
+    """Summarize latency samples (seconds) as milliseconds"""
+    return {
+        "count": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "mean_ms": (sum(samples) / len(samples) * 1000) if samples else 0.0,
+    }
+
+def timed(fn, *args, **kwargs):
+    """Call fn and return (result, elapsed seconds)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def environment():
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def write_results(path, results):
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Results written to {path}")
+
+def _flatten(data, prefix=""):
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def _higher_is_better(name):
+    return name.endswith("_per_s") or name.endswith("qps") or name.endswith("speedup") or name.endswith("ratio")
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """Return a list of regressions: metrics worse than baseline by more than tolerance"""
+    current = _flatten(results.get("metrics", {}))
+    previous = _flatten(baseline.get("metrics", {}))
+    regressions = []
+    for name, old in sorted(previous.items()):
+        new = current.get(name)
+        if new is None or old == 0 or name.endswith("count"):
+            continue
+        change = (new - old) / abs(old)
+        worse = change < -tolerance if _higher_is_better(name) else change > tolerance
+        if worse:
+            regressions.append({"metric": name, "baseline": old, "current": new, "change": change})
+    return regressions
+
+def report_comparison(results, baseline_path, tolerance):
+    """Print the comparison against a stored baseline and return True if there are no regressions
+    
+    A missing baseline fails the comparison, so a regression check can't pass by comparing against nothing.
+    """
+    if not os.path.exists(baseline_path):
+        print(f"❌ No baseline at {baseline_path}; run with --update-baseline on the reference machine to create one")
+        return False
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(results, baseline, tolerance)
+    if not regressions:
+        print(f"✅ No regressions beyond {tolerance:.0%} against {baseline_path}")
+        return True
+    print(f"❌ {len(regressions)} regression(s) beyond {tolerance:.0%} against {baseline_path}:")
+    for r in regressions:
+        print(f"   - {r['metric']}: {r['baseline']:.3f} -> {r['current']:.3f} ({r['change']:+.0%})")
+    return False
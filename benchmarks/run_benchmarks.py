@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the multi-agent chatbot.
+
+Runs entirely on stub models (no OpenAI key, no network) against a synthetic
+PDF corpus and measures ingestion throughput, startup time, query latency
+percentiles and concurrency scaling. Results are written to JSON and compared
+against a stored baseline so regressions can fail CI.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path to import multi_agent_chatbot
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from multi_agent_chatbot import MultiAgentChatbot
+from metrics import INGEST_CHUNKS, INGEST_PAGES
+from stubs import HashingEmbeddings, StubChatModel
+from corpus import generate_corpus, sample_questions
+from harness import environment, latency_summary, percentile, report_comparison, timed, write_results
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def build_chatbot(args, documents_dir, vector_stores_dir):
+    """Create a chatbot wired to stub models with the configured delays"""
+    llm = StubChatModel(latency=args.llm_latency)
+    embeddings = HashingEmbeddings(
+        size=args.embedding_size,
+        latency=args.embedding_latency,
+        latency_per_text=args.embedding_latency_per_text,
+    )
+    return MultiAgentChatbot(documents_dir, vector_stores_dir, llm=llm, embeddings=embeddings)
+
+def bench_ingestion(args, documents_dir, vector_stores_dir):
+    """Ingest the whole corpus into fresh vector stores"""
+    if os.path.exists(vector_stores_dir):
+        shutil.rmtree(vector_stores_dir)
+    chatbot = build_chatbot(args, documents_dir, vector_stores_dir)
+    pages_before, chunks_before = INGEST_PAGES.get(), INGEST_CHUNKS.get()
+    
+    start = time.perf_counter()
+    chatbot.create_agents()
+    dedup = chatbot.process_all_documents()
+    elapsed = time.perf_counter() - start
+    
+    pages = INGEST_PAGES.get() - pages_before
+    chunks = INGEST_CHUNKS.get() - chunks_before
+    return {
+        "seconds": elapsed,
+        "documents_per_s": len(chatbot.agents) / elapsed,
+        "pages_per_s": pages / elapsed,
+        "chunks_per_s": chunks / elapsed,
+        "pages_count": pages,
+        "chunks_count": chunks,
+        "dedup_ratio": dedup["ratio"] if dedup else 0.0,
+    }
+
+def bench_startup(args, documents_dir, vector_stores_dir, repeats=3):
+    """Time discovering agents and opening their existing vector stores"""
+    create_samples, load_samples = [], []
+    for _ in range(repeats):
+        chatbot = build_chatbot(args, documents_dir, vector_stores_dir)
+        _, create_time = timed(chatbot.create_agents)
+        start = time.perf_counter()
+        for agent in chatbot.agents.values():
+            agent.load_existing_vectorstore()
+        load_samples.append(time.perf_counter() - start)
+        create_samples.append(create_time)
+    create_ms = percentile(create_samples, 50) * 1000
+    load_ms = percentile(load_samples, 50) * 1000
+    return {"create_agents_ms": create_ms, "load_stores_ms": load_ms, "total_ms": create_ms + load_ms}
+
+def bench_query_latency(args, chatbot, questions):
+    """Sequential conversations against every agent"""
+    samples = []
+    for _ in range(args.rounds):
+        for agent in chatbot.agents.values():
+            agent.memory.clear()
+            for question in questions:
+                _, elapsed = timed(chatbot.get_agent_response, agent.agent_name, question)
+                samples.append(elapsed)
+    return latency_summary(samples)
+
+def bench_concurrency(args, chatbot, questions):
+    """Throughput and tail latency with N concurrent callers"""
+    agent_names = list(chatbot.agents.keys())
+    work = [(agent_names[i % len(agent_names)], questions[i % len(questions)])
+            for i in range(args.requests_per_level)]
+    
+    def call(item):
+        return timed(chatbot.get_agent_response, *item)[1]
+    
+    results = {}
+    base_qps = None
+    for level in args.concurrency:
+        for agent in chatbot.agents.values():
+            agent.memory.clear()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as pool:
+            samples = list(pool.map(call, work))
+        elapsed = time.perf_counter() - start
+        qps = len(work) / elapsed
+        base_qps = base_qps or qps
+        summary = latency_summary(samples)
+        results[f"threads_{level}"] = {
+            "qps": qps,
+            "speedup": qps / base_qps,
+            "p50_ms": summary["p50_ms"],
+            "p95_ms": summary["p95_ms"],
+        }
+    return results
+
+def bench_batch(args, chatbot, questions):
+    """Stateless batch answering vs. the same questions one request at a time"""
+    agent_names = list(chatbot.agents.keys())
+    items = [(agent_names[i % len(agent_names)], questions[i % len(questions)])
+             for i in range(args.requests_per_level)]
+    
+    start = time.perf_counter()
+    results = list(chatbot.answer_batch(items, max_concurrency=max(args.concurrency)))
+    batch_s = time.perf_counter() - start
+    errors = sum(1 for result in results if "error" in result)
+    
+    start = time.perf_counter()
+    for agent_name, question in items:
+        chatbot.agents[agent_name].memory.clear()
+        chatbot.get_agent_response(agent_name, question)
+    sequential_s = time.perf_counter() - start
+    return {
+        "items_count": len(items),
+        "errors_count": errors,
+        "qps": len(items) / batch_s,
+        "speedup": sequential_s / batch_s,
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=3, help="number of synthetic PDFs")
+    parser.add_argument("--pages", type=int, default=5, help="pages per synthetic PDF")
+    parser.add_argument("--rounds", type=int, default=3, help="conversation rounds for the latency benchmark")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="comma-separated thread counts")
+    parser.add_argument("--requests-per-level", type=int, default=32)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="stub LLM delay per call (s)")
+    parser.add_argument("--embedding-latency", type=float, default=0.005, help="stub embedding delay per call (s)")
+    parser.add_argument("--embedding-latency-per-text", type=float, default=0.0005)
+    parser.add_argument("--embedding-size", type=int, default=256)
+    parser.add_argument("--workdir", help="directory for the corpus and stores (default: temporary)")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results", "latest.json"))
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline.json"))
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+    return args
+
+def main():
+    args = parse_args()
+    workdir = args.workdir or tempfile.mkdtemp(prefix="chatbot-bench-")
+    documents_dir = os.path.join(workdir, f"documents_{args.documents}x{args.pages}")
+    vector_stores_dir = os.path.join(workdir, "vector_stores")
+    
+    print("🏁 Offline Benchmark Suite")
+    print("="*50)
+    print(f"Work directory: {workdir}")
+    
+    try:
+        print("\n1. Generating synthetic corpus...")
+        generate_corpus(documents_dir, args.documents, args.pages)
+        questions = sample_questions(args.documents)
+        
+        print("2. Ingestion throughput...")
+        ingestion = bench_ingestion(args, documents_dir, vector_stores_dir)
+        
+        print("3. Startup time...")
+        startup = bench_startup(args, documents_dir, vector_stores_dir)
+        
+        chatbot = build_chatbot(args, documents_dir, vector_stores_dir)
+        chatbot.create_agents()
+        chatbot.process_all_documents()
+        
+        print("4. Query latency...")
+        latency = bench_query_latency(args, chatbot, questions)
+        
+        print("5. Concurrency scaling...")
+        concurrency = bench_concurrency(args, chatbot, questions)
+        
+        print("6. Batch answering...")
+        batch = bench_batch(args, chatbot, questions)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    config = dict(vars(args))
+    config.pop("workdir", None)
+    results = {
+        "environment": environment(),
+        "config": config,
+        "metrics": {
+            "ingestion": ingestion,
+            "startup": startup,
+            "query_latency": latency,
+            "concurrency": concurrency,
+            "batch": batch,
+        },
+    }
+    
+    print(f"\n{'='*50}")
+    print(f"Ingestion: {ingestion['pages_per_s']:.1f} pages/s, {ingestion['chunks_per_s']:.1f} chunks/s")
+    print(f"Startup: {startup['total_ms']:.1f} ms")
+    print(f"Query latency: p50 {latency['p50_ms']:.1f} ms, p95 {latency['p95_ms']:.1f} ms")
+    for level, stats in concurrency.items():
+        print(f"Concurrency {level}: {stats['qps']:.1f} qps (x{stats['speedup']:.2f}), p95 {stats['p95_ms']:.1f} ms")
+    print(f"Batch: {batch['qps']:.1f} qps (x{batch['speedup']:.2f} vs sequential), {batch['errors_count']} errors")
+    print(f"{'='*50}")
+    
+    write_results(args.output, results)
+    if args.update_baseline:
+        write_results(args.baseline, results)
+        return 0
+    return 0 if report_comparison(results, args.baseline, args.tolerance) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+"""
+Conversation history stored in a shared state backend, so every worker
+process continues the same conversation.
+"""
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import messages_from_dict, messages_to_dict
+
+
+class SharedChatMessageHistory(BaseChatMessageHistory):
+    """LangChain chat history persisted as a list in a StateBackend"""
+
+    def __init__(self, state, key):
+        self.state = state
+        self.key = key
+
+    @property
+    def messages(self):
+        return messages_from_dict(self.state.lrange(self.key))
+
+    def add_message(self, message):
+        self.state.rpush(self.key, messages_to_dict([message])[0])
+
+    def clear(self):
+        self.state.delete(self.key)
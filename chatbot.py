@@ -1,73 +1,184 @@
-from langchain_openai import ChatOpenAI
-from langchain.chains import ConversationalRetrievalChain
-from langchain.memory import ConversationBufferMemory
+# LangChain is imported on first use (see HybridChatbot.llm / .memory) so the
+# rule-based path and health checks don't pay for loading it
 from document_processor import DocumentProcessor
 from rule_based import RuleBasedHandler
+from shared_state import create_state_backend
+from retrieval_pipeline import SPECULATIVE_RETRIEVAL, SpeculativeRetrievalPipeline
+from rate_limit import LLM_ADMISSION, RateLimitExceeded, call_with_backoff
 import os
 from dotenv import load_dotenv
-from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+from metrics import RESPONSES, stage_timer
+import logging
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class HybridChatbot:
-    def __init__(self):
-        # Initialize OpenAI client with correct parameters
-        self.llm = ChatOpenAI(
-            model_name="gpt-4o-mini",
-            temperature=0.7,
-            openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
-        self.document_processor = DocumentProcessor()
+    def __init__(self, llm=None, embeddings=None, state=None):
+        # The OpenAI client is created on first use (see the llm property)
+        self._llm = llm
+        self.document_processor = DocumentProcessor(embeddings=embeddings)
         self.rule_handler = RuleBasedHandler()
-        self.memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True
-        )
+        # Conversation and index version live in the shared backend so all workers agree
+        self.state = state or create_state_backend()
+        self.index_version = 0
+        self._memory = None
         
         # Initialize RAG components
         self.vectorstore = None
         self.qa_chain = None
         
+    @property
+    def llm(self):
+        if self._llm is None:
+            from langchain_openai import ChatOpenAI
+
+            # Initialize OpenAI client with correct parameters
+            self._llm = ChatOpenAI(
+                model_name="gpt-4o-mini",
+                temperature=0.7,
+                openai_api_key=os.getenv("OPENAI_API_KEY"),
+                # 429 retries are handled by rate_limit.call_with_backoff
+                max_retries=0
+            )
+        return self._llm
+        
+    @property
+    def memory(self):
+        if self._memory is None:
+            from langchain.memory import ConversationBufferMemory
+            from chat_history import SharedChatMessageHistory
+
+            self._memory = ConversationBufferMemory(
+                memory_key="chat_history",
+                return_messages=True,
+                chat_memory=SharedChatMessageHistory(self.state, "history:hybrid")
+            )
+        return self._memory
+        
     def process_documents(self):
         """Process all documents in the documents directory"""
-        print("Processing documents...")
+        logger.info("Processing documents...")
         self.vectorstore = self.document_processor.process_documents()
-        print("Documents processed successfully")
+        logger.info("Documents processed successfully")
         
         # Initialize QA chain after processing documents
         self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": 3})
         # self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": 1})
+        self._initialize_qa_chain()
+        # Notify the other workers that the store changed
+        self.index_version = self.state.incr("index_version:hybrid")
+        logger.info("QA chain initialized with processed documents")
+        return self.vectorstore
+        
+    def _initialize_qa_chain(self):
+        """Build the QA chain on top of the current retriever"""
+        self.qa_chain = self._build_qa_chain(self.llm, self.retriever, self.memory)
+        
+    def _build_qa_chain(self, llm, retriever, memory):
+        from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
+
         system_prompt = "คุณคือผู้ช่วยตอบคำถามเกี่ยวกับเอกสารการเรียน กรุณาตอบอย่างสุภาพและเน้นข้อมูลจากเอกสารที่มี"
         prompt = ChatPromptTemplate.from_messages([
             SystemMessagePromptTemplate.from_template(system_prompt),
             HumanMessagePromptTemplate.from_template("Context:\n{context}\n\nQuestion: {question}")
         ])
 
-        self.qa_chain = ConversationalRetrievalChain.from_llm(
-            llm=self.llm,
-            retriever=self.retriever,
-            memory=self.memory,
+        if SPECULATIVE_RETRIEVAL:
+            return SpeculativeRetrievalPipeline.from_langchain(llm, retriever, prompt, memory)
+        from langchain.chains import ConversationalRetrievalChain
+
+        return ConversationalRetrievalChain.from_llm(
+            llm=llm,
+            retriever=retriever,
+            memory=memory,
             combine_docs_chain_kwargs={"prompt": prompt}
         )
-        print("QA chain initialized with processed documents")
-        return self.vectorstore
+        
+    def warm_up(self):
+        """Load the persisted vector store (if any) and run one query against a stub LLM"""
+        retriever = self.document_processor.get_retriever()
+        if retriever is None:
+            return False
+        self.retriever = retriever
+        self._initialize_qa_chain()
+        
+        # Query with a stored vector so Chroma loads its index without calling the embedding API
+        vectorstore = retriever.vectorstore
+        sample = vectorstore._collection.peek(1)
+        if sample.get("embeddings") is not None and len(sample["embeddings"]) > 0:
+            from langchain.memory import ConversationBufferMemory
+            from stubs import FixedVectorRetriever, StubChatModel
+
+            warm_retriever = FixedVectorRetriever(
+                vectorstore=vectorstore,
+                vector=[float(x) for x in sample["embeddings"][0]]
+            )
+            memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+            chain = self._build_qa_chain(StubChatModel(), warm_retriever, memory)
+            chain({"question": "What is this document about?"})
+        logger.info("Warmed up existing vector store")
+        return True
+        
+    def _check_index_version(self):
+        """Load the persisted store if another worker processed documents"""
+        current = self.state.get("index_version:hybrid", 0)
+        if current == self.index_version:
+            return
+        retriever = self.document_processor.get_retriever()
+        if retriever is not None:
+            self.retriever = retriever
+            self._initialize_qa_chain()
+            logger.info("Reloaded vector store processed by another worker (version %s)", current)
+        self.index_version = current
         
     def get_response(self, query):
         """Get response using the hybrid approach"""
+        with stage_timer("total"):
+            return self._get_response(query)
+
+    def _get_response(self, query):
+        # Start retrieval speculatively so it overlaps with the rule check
+        self._check_index_version()
+        prefetched = None
+        if isinstance(self.qa_chain, SpeculativeRetrievalPipeline):
+            from instrumentation import METRICS_CALLBACK
+
+            prefetched = self.qa_chain.prefetch(query, [METRICS_CALLBACK])
+        
         # First, try rule-based response
-        rule_response = self.rule_handler.get_response(query)
-        print("rule_response", rule_response)
+        with stage_timer("rule_match"):
+            rule_response = self.rule_handler.get_response(query)
+        logger.debug("rule_response %s", rule_response)
         if rule_response:
+            if prefetched is not None:
+                prefetched.cancel()
+            RESPONSES.inc(source="rule")
             return rule_response
             
         # If no rule matches, use RAG + LLM
+        inputs = {"question": query}
+        if prefetched is not None:
+            inputs["prefetched"] = prefetched
         try:
             if not self.qa_chain:
+                RESPONSES.inc(source="not_ready")
                 return "Please process documents first using the /process-documents endpoint"
-                
-            response = self.qa_chain({"question": query})
-            print("RAG response:", response["answer"])
+            from instrumentation import METRICS_CALLBACK
+
+            with LLM_ADMISSION.slot("hybrid"):
+                response = call_with_backoff(
+                    lambda: self.qa_chain(inputs, callbacks=[METRICS_CALLBACK])
+                )
+            logger.debug("RAG response: %s", response["answer"])
+            RESPONSES.inc(source="rag")
             return response["answer"]
+        except RateLimitExceeded:
+            # Surfaced to the API as 429 instead of being returned as an answer
+            RESPONSES.inc(source="rate_limited")
+            raise
         except Exception as e:
-            print(f"Error in RAG response: {str(e)}")
-            return f"I apologize, but I encountered an error: {str(e)}" 
\ No newline at end of file
+            logger.error("Error in RAG response: %s", e)
+            RESPONSES.inc(source="error")
+            return f"I apologize, but I encountered an error: {str(e)}"
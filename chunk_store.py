@@ -0,0 +1,106 @@
+"""
+Compact records for retrieved chunks.
+
+A LangChain Document carries its own copy of the chunk text and a metadata
+dict, and is a pydantic model that is validated on creation. On the
+retrieval -> prompt path chunks are instead ChunkRecords: slotted objects
+whose text is a (start, end) span of the agent's PageBuffer (the document's
+pages in one string) and whose metadata is a tuple of values under a shared,
+interned key tuple. Documents are created only where a LangChain chain needs
+them (to_documents).
+"""
+
+import sys
+from array import array
+
+_KEY_TUPLES = {}
+
+
+def intern_keys(keys):
+    """Canonical tuple of interned key strings, shared by every record with the same keys"""
+    keys = tuple(keys)
+    shared = _KEY_TUPLES.get(keys)
+    if shared is None:
+        shared = _KEY_TUPLES.setdefault(keys, tuple(sys.intern(key) for key in keys))
+    return shared
+
+
+class PageBuffer:
+    """The text of all pages of one document in a single string"""
+
+    __slots__ = ("text", "page_starts")
+
+    def __init__(self, pages):
+        starts, position = array("q"), 0
+        for page in pages:
+            starts.append(position)
+            position += len(page)
+        self.text = "".join(pages)
+        self.page_starts = starts
+
+    def span(self, page, start, length):
+        """Absolute (start, end) of a chunk given its page, offset within the page and length"""
+        begin = self.page_starts[page] + start
+        return begin, begin + length
+
+    def __len__(self):
+        return len(self.text)
+
+
+class ChunkRecord:
+    """A retrieved chunk: text span in a PageBuffer (or own text) plus compact metadata"""
+
+    __slots__ = ("buffer", "start", "end", "own_text", "keys", "values", "fingerprint")
+
+    def __init__(self, keys, values, buffer=None, start=0, end=0, text=None, fingerprint=None):
+        self.keys = keys
+        self.values = values
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+        self.own_text = text
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def from_metadata(cls, metadata, buffer=None, text=None):
+        """Build a record from a vector store hit; uses the buffer when the chunk offsets are known"""
+        metadata = metadata or {}
+        fingerprint = metadata.get("simhash")
+        fingerprint = int(fingerprint, 16) if fingerprint else None
+        keys = intern_keys(metadata)
+        values = tuple(metadata.values())
+        page, start, length = metadata.get("page"), metadata.get("start_index"), metadata.get("length")
+        if buffer is not None and None not in (page, start, length) and 0 <= page < len(buffer.page_starts):
+            begin, end = buffer.span(page, start, length)
+            return cls(keys, values, buffer, begin, end, fingerprint=fingerprint)
+        return cls(keys, values, text=text or "", fingerprint=fingerprint)
+
+    @property
+    def page_content(self):
+        if self.own_text is not None:
+            return self.own_text
+        return self.buffer.text[self.start:self.end]
+
+    @property
+    def metadata(self):
+        """A fresh metadata dict (built on demand, prefer get() on hot paths)"""
+        return dict(zip(self.keys, self.values))
+
+    def get(self, key, default=None):
+        try:
+            return self.values[self.keys.index(key)]
+        except ValueError:
+            return default
+
+    def to_document(self):
+        from langchain_core.documents import Document
+
+        return Document(page_content=self.page_content, metadata=self.metadata)
+
+    def __repr__(self):
+        return f"ChunkRecord({self.page_content[:40]!r}, page={self.get('page')})"
+
+
+def to_documents(chunks):
+    """Convert records to LangChain Documents at a chain boundary; Documents pass through"""
+    return [chunk.to_document() if isinstance(chunk, ChunkRecord) else chunk for chunk in chunks]
@@ -0,0 +1,182 @@
+"""
+Near-duplicate chunk detection with 64-bit SimHash fingerprints.
+
+The documents directory holds revisions and near-copies of the same material,
+so many chunks are indexed (and paid for) more than once. At ingest each chunk
+is fingerprinted: a near-duplicate of a chunk earlier in the same document is
+skipped, and a near-duplicate of a chunk in another agent's store is linked,
+i.e. copied with that chunk's stored embedding instead of being embedded
+again. At retrieval time near-duplicates are collapsed so they don't fill the
+top-k slots. Fingerprints are kept in each agent's manifest.
+"""
+
+import glob
+import hashlib
+import os
+import re
+import threading
+
+from agent_manifest import load_manifest
+
+# Set DEDUP_CHUNKS=0 to index every chunk as before
+DEDUP_CHUNKS = os.getenv("DEDUP_CHUNKS", "1") != "0"
+
+# Chunks whose fingerprints differ in at most this many of 64 bits are duplicates
+MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "3"))
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 5
+
+
+def simhash(text):
+    """64-bit SimHash over character shingles (language-agnostic, no word breaks needed)"""
+    text = re.sub(r"\s+", " ", text.lower()).strip()
+    if len(text) < SHINGLE_SIZE:
+        text = text.ljust(SHINGLE_SIZE)
+    hashes = [
+        format(int.from_bytes(hashlib.blake2b(text[i:i + SHINGLE_SIZE].encode("utf-8"), digest_size=8).digest(), "little"), "064b")
+        for i in range(len(text) - SHINGLE_SIZE + 1)
+    ]
+    # Majority vote per bit position; zip() counts the columns in C rather than bit by bit
+    half = len(hashes) / 2
+    return int("".join("1" if column.count("1") > half else "0" for column in zip(*hashes)), 2)
+
+
+def chunk_id(position):
+    """Stable id of the chunk at this position of a document, used in the vector store and manifest"""
+    return f"chunk-{position:06d}"
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex:
+    """Fingerprint lookup within a Hamming distance, using exact-match bands"""
+
+    def __init__(self, max_distance=MAX_DISTANCE):
+        # With max_distance + 1 bands, any fingerprint within max_distance
+        # matches at least one band exactly (pigeonhole principle)
+        self.max_distance = max_distance
+        self.num_bands = max_distance + 1
+        self.band_bits = -(-FINGERPRINT_BITS // self.num_bands)
+        self.buckets = {}
+
+    def _bands(self, fingerprint):
+        mask = (1 << self.band_bits) - 1
+        for band in range(self.num_bands):
+            yield band, fingerprint >> (band * self.band_bits) & mask
+
+    def add(self, fingerprint, value):
+        for key in self._bands(fingerprint):
+            self.buckets.setdefault(key, []).append((fingerprint, value))
+
+    def find(self, fingerprint):
+        """Return the value of the closest indexed fingerprint within max_distance, or None"""
+        best = None
+        for key in self._bands(fingerprint):
+            for candidate, value in self.buckets.get(key, ()):
+                distance = hamming_distance(fingerprint, candidate)
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, value)
+        return best[1] if best else None
+
+    def remove_if(self, predicate):
+        for key, entries in list(self.buckets.items()):
+            self.buckets[key] = [(fp, value) for fp, value in entries if not predicate(value)]
+
+    def __len__(self):
+        return sum(len(entries) for (band, _), entries in self.buckets.items() if band == 0)
+
+
+def collapse_duplicates(items, k, max_distance=MAX_DISTANCE, document=lambda item: item):
+    """Keep the first k items whose documents are not near-duplicates of a higher-ranked one"""
+    kept, index = [], SimHashIndex(max_distance)
+    for item in items:
+        doc = document(item)
+        # ChunkRecords carry the parsed fingerprint; Documents have it in metadata
+        fingerprint = getattr(doc, "fingerprint", None)
+        if fingerprint is None:
+            stored = doc.metadata.get("simhash")
+            fingerprint = int(stored, 16) if stored else simhash(doc.page_content)
+        if index.find(fingerprint) is not None:
+            continue
+        index.add(fingerprint, True)
+        kept.append(item)
+        if len(kept) == k:
+            break
+    return kept
+
+
+class CorpusDeduplicator:
+    """Fingerprints of every indexed chunk in a vector_stores directory"""
+
+    def __init__(self, vector_stores_dir, max_distance=MAX_DISTANCE):
+        self.vector_stores_dir = vector_stores_dir
+        self.max_distance = max_distance
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        # Built lazily from the agent manifests, so it survives restarts
+        if self._index is None:
+            self._index = SimHashIndex(self.max_distance)
+            pattern = os.path.join(self.vector_stores_dir, "chroma_db_*")
+            for vectorstore_path in sorted(glob.glob(pattern)):
+                fingerprints = (load_manifest(vectorstore_path) or {}).get("fingerprints", {})
+                for stored_id, fingerprint in fingerprints.items():
+                    self._index.add(int(fingerprint, 16), (vectorstore_path, stored_id))
+        return self._index
+
+    def plan(self, vectorstore_path, chunks):
+        """Split chunks into (new, linked, skipped) for ingestion into vectorstore_path
+
+        new: [(chunk_id, chunk)] to embed; linked: [(chunk_id, chunk, (source_path, source_id))]
+        to copy with the source chunk's embedding; skipped: duplicates within this document.
+        Each chunk gets its fingerprint in metadata["simhash"].
+        """
+        new, linked, skipped = [], [], []
+        fingerprints = [simhash(chunk.page_content) for chunk in chunks]
+        local = SimHashIndex(self.max_distance)
+        with self._lock:
+            corpus = self._load()
+            for i, (chunk, fingerprint) in enumerate(zip(chunks, fingerprints)):
+                chunk.metadata["simhash"] = f"{fingerprint:016x}"
+                if local.find(fingerprint) is not None:
+                    skipped.append(chunk)
+                    continue
+                local.add(fingerprint, i)
+                source = corpus.find(fingerprint)
+                if source is not None and source[0] != vectorstore_path:
+                    linked.append((chunk_id(i), chunk, source))
+                else:
+                    new.append((chunk_id(i), chunk))
+        return new, linked, skipped
+
+    def register(self, vectorstore_path, fingerprints):
+        """Make a freshly indexed store's chunks available for linking; replaces earlier entries"""
+        with self._lock:
+            corpus = self._load()
+            corpus.remove_if(lambda value: value[0] == vectorstore_path)
+            for stored_id, fingerprint in fingerprints.items():
+                corpus.add(int(fingerprint, 16), (vectorstore_path, stored_id))
+
+
+def dedup_report(total, linked, skipped):
+    """Summary of ingestion: ratio is the share of chunks that were not embedded again"""
+    return {
+        "chunks": total,
+        "embedded": total - linked - skipped,
+        "linked": linked,
+        "skipped": skipped,
+        "ratio": round((linked + skipped) / total, 4) if total else 0.0,
+    }
+
+
+def merge_reports(reports):
+    """Combine the reports of the agents ingested in one run"""
+    return dedup_report(
+        sum(r["chunks"] for r in reports),
+        sum(r["linked"] for r in reports),
+        sum(r["skipped"] for r in reports),
+    )
@@ -0,0 +1,137 @@
+"""
+Document digests precomputed at ingest: a summary, a section outline and
+likely question/answer pairs. They are stored in the agent manifest and
+answer the hottest questions ("What is this document about?") without
+retrieval or an LLM call.
+"""
+
+import json
+import logging
+import os
+import re
+
+from text_similarity import content_words, question_similarity
+
+logger = logging.getLogger(__name__)
+
+# Set DOCUMENT_DIGEST=0 to skip the extra LLM call at ingest
+DOCUMENT_DIGEST = os.getenv("DOCUMENT_DIGEST", "1") != "0"
+
+DIGEST_PROMPT = """You are preparing reference material for a document assistant.
+Document: {agent_name}
+
+Read the excerpts below and reply with JSON only, in exactly this shape:
+{{"summary": "3-5 sentences describing what the document is about",
+ "outline": ["section title", "..."],
+ "faq": [{{"question": "...", "answer": "..."}}]}}
+
+List up to {num_questions} questions a reader is most likely to ask, answered only
+from the excerpts. Write in the same language as the document.
+
+Excerpts:
+{excerpts}"""
+
+# Canonical phrasings of the questions answered from the summary and outline
+SUMMARY_QUESTIONS = [
+    "what is this document about",
+    "what is this about",
+    "summarize this document",
+    "give me a summary",
+    "give me an overview of this document",
+    "เอกสารนี้เกี่ยวกับอะไร",
+    "สรุปเอกสารนี้",
+]
+OUTLINE_QUESTIONS = [
+    "what are the sections of this document",
+    "show the table of contents",
+    "what topics does this document cover",
+    "เอกสารนี้มีหัวข้ออะไรบ้าง",
+]
+
+MATCH_THRESHOLD = 0.75
+_NUMBERS = re.compile(r"\d+")
+
+
+def _normalize(text):
+    return re.sub(r"[\s?!.。]+$", "", " ".join(text.lower().split()))
+
+
+def sample_excerpts(pages, max_chars=12000):
+    """Join page texts, sampling evenly spaced pages when the document exceeds the budget"""
+    pages = [(i, text.strip()) for i, text in enumerate(pages) if text and text.strip()]
+    if not pages:
+        return ""
+    per_page = max(500, max_chars // len(pages))
+    if len(pages) * per_page > max_chars:
+        step = len(pages) / (max_chars // per_page)
+        pages = [pages[int(i * step)] for i in range(max_chars // per_page)]
+    return "\n\n".join(f"[page {i + 1}]\n{text[:per_page]}" for i, text in pages)
+
+
+def parse_digest(text):
+    """Extract the digest JSON from an LLM reply, tolerating code fences and chatter"""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("No JSON object in digest reply")
+    data = json.loads(text[start:end + 1])
+    faq = [
+        {"question": str(item["question"]), "answer": str(item["answer"])}
+        for item in data.get("faq", [])
+        if isinstance(item, dict) and item.get("question") and item.get("answer")
+    ]
+    return {
+        "summary": str(data.get("summary", "")).strip(),
+        "outline": [str(title) for title in data.get("outline", []) if title],
+        "faq": faq,
+    }
+
+
+def build_digest(llm, pages, agent_name, num_questions=8, callbacks=None):
+    """Ask the LLM once for the summary, outline and FAQ of a document"""
+    prompt = DIGEST_PROMPT.format(
+        agent_name=agent_name,
+        num_questions=num_questions,
+        excerpts=sample_excerpts(pages),
+    )
+    reply = llm.invoke(prompt, config={"callbacks": callbacks or []})
+    try:
+        return parse_digest(reply.content)
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning("Could not parse digest for '%s' (%s); keeping the raw reply as summary", agent_name, e)
+        return {"summary": reply.content.strip(), "outline": [], "faq": []}
+
+
+def _key_terms(text):
+    """Numbers and content words; a stored answer only fits a question asking about exactly these"""
+    return sorted(_NUMBERS.findall(text)), set(content_words(text))
+
+
+def _best_match(query, questions):
+    """(score, index) of the closest question that has the query's key terms, or (0.0, None)
+
+    Near misses ("year 3" vs "year 4", "what is this document about grading") are
+    nearly identical as trigrams but need a different answer, so similarity alone
+    is not enough.
+    """
+    terms = _key_terms(query)
+    best_score, best_index = 0.0, None
+    for index, question in enumerate(questions):
+        question = _normalize(question)
+        score = question_similarity(query, question)
+        if score > best_score and _key_terms(question) == terms:
+            best_score, best_index = score, index
+    return best_score, best_index
+
+
+def match_digest(query, digest, threshold=MATCH_THRESHOLD):
+    """Return a precomputed answer for the query, or None if it needs retrieval"""
+    if not digest:
+        return None
+    query = _normalize(query)
+    if digest.get("summary") and _best_match(query, SUMMARY_QUESTIONS)[0] >= threshold:
+        return digest["summary"]
+    if digest.get("outline") and _best_match(query, OUTLINE_QUESTIONS)[0] >= threshold:
+        return "\n".join(f"{i}. {title}" for i, title in enumerate(digest["outline"], 1))
+    faq = digest.get("faq", [])
+    score, index = _best_match(query, [item["question"] for item in faq])
+    return faq[index]["answer"] if index is not None and score >= threshold else None
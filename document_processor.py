@@ -1,73 +1,109 @@
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
+from page_cache import get_page_cache, load_pdf_pages
+from metrics import INGEST_CHUNKS, INGEST_LATENCY, INGEST_PAGES
 import os
+import logging
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class DocumentProcessor:
-    def __init__(self, documents_dir="documents"):
+    def __init__(self, documents_dir="documents", embeddings=None, vector_stores_dir="vector_stores"):
         self.documents_dir = documents_dir
-        self.embeddings = OpenAIEmbeddings(
-            openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
+        # Embeddings and splitter are built on first use so LangChain loads lazily
+        self._base_embeddings = embeddings
+        self._embeddings = None
+        self._text_splitter = None
+        # Same place as the multi-agent cache, which is persisted (and git-ignored) with the stores
+        self.page_cache = get_page_cache(os.path.join(vector_stores_dir, "page_cache"))
+        
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            from instrumentation import TimedEmbeddings
+
+            base = self._base_embeddings
+            if base is None:
+                from langchain_openai import OpenAIEmbeddings
+
+                base = OpenAIEmbeddings(openai_api_key=os.getenv("OPENAI_API_KEY"))
+            self._embeddings = TimedEmbeddings(base)
+        return self._embeddings
+        
+    @property
+    def text_splitter(self):
+        if self._text_splitter is None:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+            self._text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=1000,
+                chunk_overlap=200,
+                length_function=len,
+            )
+        return self._text_splitter
         
     def process_documents(self):
         """Process all PDF documents in the documents directory"""
+        with INGEST_LATENCY.time(stage="total"):
+            return self._process_documents()
+
+    def _process_documents(self):
         if not os.path.exists(self.documents_dir):
             os.makedirs(self.documents_dir)
-            print(f"Created documents directory: {self.documents_dir}")
+            logger.info("Created documents directory: %s", self.documents_dir)
             
         documents = []
         pdf_files = [f for f in os.listdir(self.documents_dir) if f.endswith('.pdf')]
         
         if not pdf_files:
-            print("No PDF files found in documents directory")
+            logger.warning("No PDF files found in documents directory")
             return None
             
-        print(f"Found {len(pdf_files)} PDF files")
+        logger.info("Found %d PDF files", len(pdf_files))
         
-        for filename in pdf_files:
-            file_path = os.path.join(self.documents_dir, filename)
-            print(f"Processing file: {filename}")
-            loader = PyPDFLoader(file_path)
-            documents.extend(loader.load())
+        with INGEST_LATENCY.time(stage="load"):
+            for filename in pdf_files:
+                file_path = os.path.join(self.documents_dir, filename)
+                logger.info("Processing file: %s", filename)
+                documents.extend(load_pdf_pages(file_path, self.page_cache))
         
         if not documents:
-            print("No documents were loaded")
+            logger.warning("No documents were loaded")
             return None
             
-        print(f"Loaded {len(documents)} document chunks")
+        INGEST_PAGES.inc(len(documents))
+        logger.info("Loaded %d document chunks", len(documents))
         
         # Split documents into chunks
-        splits = self.text_splitter.split_documents(documents)
-        print(f"Split into {len(splits)} chunks")
+        with INGEST_LATENCY.time(stage="split"):
+            splits = self.text_splitter.split_documents(documents)
+        logger.info("Split into %d chunks", len(splits))
         
         # Create and persist vector store
-        print("Creating vector store...")
-        vectorstore = Chroma.from_documents(
-            documents=splits,
-            embedding=self.embeddings,
-            persist_directory="chroma_db"
-        )
-        vectorstore.persist()
-        print("Vector store created and persisted")
+        logger.info("Creating vector store...")
+        from langchain_community.vectorstores import Chroma
+
+        with INGEST_LATENCY.time(stage="index"):
+            vectorstore = Chroma.from_documents(
+                documents=splits,
+                embedding=self.embeddings,
+                persist_directory="chroma_db"
+            )
+            vectorstore.persist()
+        INGEST_CHUNKS.inc(len(splits))
+        logger.info("Vector store created and persisted")
         return vectorstore
     
     def get_retriever(self):
         """Get the retriever for the vector store"""
         if not os.path.exists("chroma_db"):
-            print("No existing vector store found")
+            logger.info("No existing vector store found")
             return None
             
-        print("Loading existing vector store")
+        logger.info("Loading existing vector store")
+        from langchain_community.vectorstores import Chroma
+
         vectorstore = Chroma(
             persist_directory="chroma_db",
             embedding_function=self.embeddings
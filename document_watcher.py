@@ -0,0 +1,207 @@
+"""
+Watch the documents directory and hand changed PDFs to a callback, one file
+at a time, so new or edited documents are ingested without a full rescan.
+
+On Linux the kernel's inotify is used through ctypes (no extra dependency);
+elsewhere, or if inotify is unavailable, the directory is polled. Bursts of
+events for one file (a copy in progress, an editor saving twice) are
+debounced: a file is dispatched once it has been quiet for `debounce` seconds.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")
+
+CHANGED = "changed"
+DELETED = "deleted"
+OVERFLOW = "overflow"
+
+
+class InotifySource:
+    """Directory events from inotify: (name, CHANGED | DELETED), or (None, OVERFLOW)"""
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def poll(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events, offset = [], 0
+        while offset + _EVENT.size <= len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                events.append((None, OVERFLOW))
+            elif name:
+                kind = DELETED if mask & (IN_DELETE | IN_MOVED_FROM) else CHANGED
+                events.append((os.fsdecode(name), kind))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingSource:
+    """Directory events from comparing (size, mtime) snapshots every `interval` seconds"""
+
+    def __init__(self, directory, interval=5.0, stop_event=None):
+        self.directory = directory
+        self.interval = interval
+        self.stop_event = stop_event or threading.Event()
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            pass
+        return snapshot
+
+    def poll(self, timeout):
+        self.stop_event.wait(min(timeout, self.interval))
+        snapshot = self._scan()
+        events = [(name, CHANGED) for name, state in snapshot.items() if self._snapshot.get(name) != state]
+        events.extend((name, DELETED) for name in self._snapshot if name not in snapshot)
+        self._snapshot = snapshot
+        return events
+
+    def close(self):
+        pass
+
+
+class DocumentWatcher:
+    """Background thread calling on_change(path) / on_delete(path) for debounced PDF changes"""
+
+    def __init__(self, directory, on_change, on_delete, debounce=2.0, poll_interval=5.0, backend="auto", suffix=".pdf",
+                 retry_delay=30.0, max_retries=5):
+        self.directory = directory
+        self.on_change = on_change
+        self.on_delete = on_delete
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.backend = backend
+        self.suffix = suffix.lower()
+        # A failed handler (e.g. a transient embedding error) is retried with exponential backoff
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+        self._failures = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._source = None
+
+    def _open_source(self):
+        if self.backend in ("auto", "inotify"):
+            try:
+                return InotifySource(self.directory)
+            except (OSError, AttributeError) as e:
+                if self.backend == "inotify":
+                    raise
+                logger.info("inotify unavailable (%s), polling %s every %.1fs", e, self.directory, self.poll_interval)
+        return PollingSource(self.directory, self.poll_interval, self._stop)
+
+    def start(self):
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        self._source = self._open_source()
+        self._thread = threading.Thread(target=self._run, name="document-watcher", daemon=True)
+        self._thread.start()
+        logger.info("Watching %s with %s", self.directory, type(self._source).__name__)
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._source is not None:
+            self._source.close()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        pending = {}
+        while not self._stop.is_set():
+            now = time.monotonic()
+            timeout = min([1.0] + [deadline - now for deadline in pending.values()])
+            try:
+                events = self._source.poll(max(0.0, timeout))
+            except OSError as e:
+                logger.error("Document watcher failed to read events: %s", e)
+                self._stop.wait(self.poll_interval)
+                continue
+            now = time.monotonic()
+            for name, kind in events:
+                if kind == OVERFLOW:
+                    # Events were dropped: re-check every document
+                    names = [n for n in os.listdir(self.directory) if n.lower().endswith(self.suffix)]
+                    pending.update((n, now + self.debounce) for n in names)
+                elif name.lower().endswith(self.suffix):
+                    # Each new event for a file restarts its quiet period
+                    pending[name] = now + self.debounce
+                    self._failures.pop(name, None)
+            for name, deadline in list(pending.items()):
+                if deadline <= now and not self._stop.is_set():
+                    del pending[name]
+                    if self._dispatch(name):
+                        self._failures.pop(name, None)
+                        continue
+                    failures = self._failures[name] = self._failures.get(name, 0) + 1
+                    if failures <= self.max_retries:
+                        pending[name] = time.monotonic() + self.retry_delay * 2 ** (failures - 1)
+                    else:
+                        logger.error("Giving up on %s after %d attempts until it changes again", name, failures)
+                        del self._failures[name]
+
+    def _dispatch(self, name):
+        """Handle the file's current state; False if the handler failed"""
+        # Whatever the last event was, the file system decides: present means (re)ingest
+        path = os.path.join(self.directory, name)
+        try:
+            if os.path.exists(path):
+                self.on_change(path)
+            else:
+                self.on_delete(path)
+        except Exception as e:
+            logger.error("Failed to handle change of %s: %s", path, e)
+            return False
+        return True
@@ -0,0 +1,69 @@
+"""
+Extractive answers: return the best-matching sentence from the retrieved
+chunks, with a page citation, when retrieval is confident enough. Lookup-style
+questions are then answered in milliseconds without an LLM call; everything
+else falls back to generation.
+"""
+
+import os
+import re
+
+from text_similarity import content_words, trigrams
+
+ANSWER_MODES = ("generative", "extractive")
+DEFAULT_ANSWER_MODE = os.getenv("ANSWER_MODE", "generative")
+
+# Minimum vector relevance of the best chunk, and minimum share of the
+# question's character trigrams found in the chosen sentence
+MIN_RELEVANCE = float(os.getenv("EXTRACTIVE_MIN_RELEVANCE", "0.75"))
+MIN_COVERAGE = float(os.getenv("EXTRACTIVE_MIN_COVERAGE", "0.5"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?。])\s+|\n+")
+
+
+def split_sentences(text):
+    """Split on sentence punctuation and line breaks (Thai text has no sentence punctuation)"""
+    return [s.strip() for s in _SENTENCE_END.split(text) if len(s.strip()) > 1]
+
+
+def coverage(question, sentence):
+    """Share of the question's content-word trigrams that appear in the sentence"""
+    # Per word, so trigrams spanning two question words don't require them to be adjacent
+    wanted = set().union(*(trigrams(word) for word in content_words(question)))
+    if not wanted:
+        return 0.0
+    return len(wanted & trigrams(sentence)) / len(wanted)
+
+
+def format_citation(metadata):
+    source = os.path.basename(metadata.get("source", "")) or "document"
+    page = metadata.get("page")
+    return f"{source}, page {page + 1}" if isinstance(page, int) else source
+
+
+def extract_answer(question, scored_documents, min_relevance=MIN_RELEVANCE, min_coverage=MIN_COVERAGE):
+    """Pick the best sentence from (document, relevance) pairs, or None if not confident"""
+    if not scored_documents:
+        return None
+    top_relevance = max(relevance for _, relevance in scored_documents)
+    if top_relevance < min_relevance:
+        return None
+
+    best = None
+    for document, relevance in scored_documents:
+        for sentence in split_sentences(document.page_content):
+            # Ties go to the chunk the vector search ranked higher
+            score = (coverage(question, sentence), relevance)
+            if best is None or score > best[0]:
+                best = (score, sentence, document.metadata)
+    if best is None or best[0][0] < min_coverage:
+        return None
+
+    (sentence_coverage, relevance), sentence, metadata = best
+    return {
+        "answer": f"{sentence}\n\n(Source: {format_citation(metadata)})",
+        "sentence": sentence,
+        "citation": format_citation(metadata),
+        "relevance": relevance,
+        "coverage": sentence_coverage,
+    }
@@ -0,0 +1,336 @@
+"""
+Packed index files: one agent's chunks, embeddings and manifest in a single
+versioned, checksummed file that can be memory-mapped.
+
+Deploying a pack instead of a chroma_db_* directory means a fresh container
+restores the store without calling the embedding API. Layout:
+
+    8s magic | u16 format version | u16 flags | u32 header length
+    header JSON (agent name, counts, manifest, section offsets and SHA-256)
+    padding to 64 bytes
+    embeddings section: count x dimension little-endian float32, row-major
+    chunks section: one JSON line per chunk (id, text, metadata)
+
+Usage:
+    python index_pack.py export --all --output-dir vector_stores/packs
+    python index_pack.py import vector_stores/packs/*.chatpack
+    python index_pack.py info vector_stores/packs/handbook.chatpack
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import sys
+import time
+from array import array
+
+from agent_manifest import agent_store_path, load_manifest, save_manifest
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CHATPACK"
+FORMAT_VERSION = 1
+PREFIX = struct.Struct("<8sHHI")
+ALIGNMENT = 64
+PACK_EXTENSION = ".chatpack"
+IMPORT_BATCH_SIZE = 1000
+
+
+class PackError(ValueError):
+    """The file is not a valid pack, or its contents do not match the checksums"""
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _float32_bytes(vectors):
+    values = array("f")
+    for vector in vectors:
+        values.extend(vector)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_pack(path, agent_name, ids, embeddings, documents, metadatas, manifest=None):
+    """Write a pack atomically; embeddings is a sequence of equal-length vectors"""
+    dimension = len(embeddings[0]) if len(embeddings) else 0
+    if any(len(vector) != dimension for vector in embeddings):
+        raise PackError("All embeddings must have the same dimension")
+    vectors = _float32_bytes(embeddings)
+    chunks = b"".join(
+        json.dumps({"id": i, "text": text, "metadata": metadata or {}}, ensure_ascii=False).encode("utf-8") + b"\n"
+        for i, text, metadata in zip(ids, documents, metadatas)
+    )
+    sections = {
+        "embeddings": {"offset": 0, "length": len(vectors)},
+        "chunks": {"offset": _align(len(vectors)), "length": len(chunks)},
+    }
+    header = {
+        "agent_name": agent_name,
+        "count": len(ids),
+        "dimension": dimension,
+        "dtype": "float32",
+        "exported_at": time.time(),
+        "manifest": manifest or {},
+        "sections": sections,
+        "sha256": {
+            "embeddings": hashlib.sha256(vectors).hexdigest(),
+            "chunks": hashlib.sha256(chunks).hexdigest(),
+        },
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = _align(PREFIX.size + len(header_bytes))
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(PREFIX.pack(MAGIC, FORMAT_VERSION, 0, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (data_start - f.tell()))
+        f.write(vectors)
+        f.write(b"\0" * (data_start + sections["chunks"]["offset"] - f.tell()))
+        f.write(chunks)
+    os.replace(tmp_path, path)
+    return header
+
+
+class PackedIndex:
+    """Read-only, memory-mapped view of a pack file"""
+
+    def __init__(self, path, verify=True):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise PackError(f"{path} is empty")
+        self._views = []
+        try:
+            self.header = self._read_header()
+            if verify:
+                self.verify()
+        except Exception:
+            self.close()
+            raise
+
+    def _read_header(self):
+        if len(self._mmap) < PREFIX.size:
+            raise PackError(f"{self.path} is too short to be a pack")
+        magic, version, _, header_length = PREFIX.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise PackError(f"{self.path} is not a pack file")
+        if version != FORMAT_VERSION:
+            raise PackError(f"{self.path} has pack format {version}, expected {FORMAT_VERSION}")
+        try:
+            header = json.loads(self._mmap[PREFIX.size:PREFIX.size + header_length].decode("utf-8"))
+        except ValueError as e:
+            raise PackError(f"{self.path} has a corrupt header: {e}")
+        self._data_start = _align(PREFIX.size + header_length)
+        return header
+
+    def _section(self, name):
+        section = self.header["sections"][name]
+        start = self._data_start + section["offset"]
+        if start + section["length"] > len(self._mmap):
+            raise PackError(f"{self.path} is truncated")
+        view = memoryview(self._mmap)[start:start + section["length"]]
+        self._views.append(view)
+        return view
+
+    def verify(self):
+        """Check both sections against the SHA-256 recorded at export"""
+        for name, expected in self.header["sha256"].items():
+            if hashlib.sha256(self._section(name)).hexdigest() != expected:
+                raise PackError(f"{self.path}: checksum mismatch in the {name} section")
+
+    @property
+    def agent_name(self):
+        return self.header["agent_name"]
+
+    @property
+    def manifest(self):
+        return self.header["manifest"]
+
+    def __len__(self):
+        return self.header["count"]
+
+    def embeddings(self):
+        """Flat float32 view of all embeddings, row-major; no copy is made"""
+        view = self._section("embeddings")
+        if sys.byteorder == "big":
+            values = array("f", view.tobytes())
+            values.byteswap()
+            return memoryview(values)
+        flat = view.cast("f")
+        self._views.append(flat)
+        return flat
+
+    def vector(self, index, flat=None):
+        flat = flat if flat is not None else self.embeddings()
+        dimension = self.header["dimension"]
+        return flat[index * dimension:(index + 1) * dimension].tolist()
+
+    def chunks(self):
+        """Yield (id, text, metadata) in the same order as the embeddings"""
+        for line in self._section("chunks").tobytes().splitlines():
+            chunk = json.loads(line)
+            yield chunk["id"], chunk["text"], chunk["metadata"]
+
+    def close(self):
+        # Views must be released before the map can be closed
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_store(vectorstore_path, output_path, agent_name):
+    """Pack an agent's Chroma store and manifest into output_path"""
+    from langchain_community.vectorstores import Chroma
+
+    collection = Chroma(persist_directory=vectorstore_path)._collection
+    stored = collection.get(include=["embeddings", "documents", "metadatas"])
+    header = write_pack(
+        output_path,
+        agent_name,
+        stored["ids"],
+        stored["embeddings"] or [],
+        stored["documents"] or [],
+        stored["metadatas"] or [],
+        manifest=load_manifest(vectorstore_path),
+    )
+    logger.info("Exported %d chunks of agent '%s' to %s", header["count"], agent_name, output_path)
+    return header
+
+
+def import_pack(pack_path, vector_stores_dir, agent_name=None, force=False):
+    """Restore a pack as a Chroma store without calling the embedding API
+
+    The store is built in a temporary directory and renamed into place, so a
+    concurrent reader (or another worker importing the same pack) never sees a
+    half-written store. Returns the store path, or None if it already exists.
+    """
+    from langchain_community.vectorstores import Chroma
+
+    with PackedIndex(pack_path) as pack:
+        agent_name = agent_name or pack.agent_name
+        target = agent_store_path(vector_stores_dir, agent_name)
+        if os.path.exists(target) and not force:
+            logger.info("Store for agent '%s' already exists, skipping %s", agent_name, pack_path)
+            return None
+
+        tmp_path = f"{target}.importing.{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        collection = Chroma(persist_directory=tmp_path)._collection
+        flat = pack.embeddings()
+        chunks = list(pack.chunks())
+        for start in range(0, len(chunks), IMPORT_BATCH_SIZE):
+            batch = chunks[start:start + IMPORT_BATCH_SIZE]
+            collection.upsert(
+                ids=[chunk_id for chunk_id, _, _ in batch],
+                embeddings=[pack.vector(start + i, flat) for i in range(len(batch))],
+                documents=[text for _, text, _ in batch],
+                # Chroma rejects empty metadata dicts
+                metadatas=[metadata or None for _, _, metadata in batch],
+            )
+        if pack.manifest:
+            save_manifest(tmp_path, dict(pack.manifest, imported_from=os.path.basename(pack_path)))
+        count = len(pack)
+
+    if force and os.path.exists(target):
+        shutil.rmtree(target)
+    try:
+        os.rename(tmp_path, target)
+    except OSError:
+        # Another process imported it first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        return None
+    logger.info("Imported %d chunks for agent '%s' into %s", count, agent_name, target)
+    return target
+
+
+def import_packs(packs_dir, vector_stores_dir):
+    """Import every pack in packs_dir whose agent has no store yet; returns the imported store paths"""
+    imported = []
+    for pack_path in sorted(glob.glob(os.path.join(packs_dir, f"*{PACK_EXTENSION}"))):
+        try:
+            target = import_pack(pack_path, vector_stores_dir)
+        except Exception as e:
+            logger.error("Could not import %s: %s", pack_path, e)
+            continue
+        if target:
+            imported.append(target)
+    return imported
+
+
+def _agent_name_for_store(store_path):
+    manifest = load_manifest(store_path) or {}
+    if manifest.get("pdf_path"):
+        return os.path.splitext(os.path.basename(manifest["pdf_path"]))[0]
+    return os.path.basename(store_path).replace("chroma_db_", "", 1).replace("_", " ")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vector-stores-dir", default="vector_stores")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="pack agent stores into .chatpack files")
+    export_parser.add_argument("agents", nargs="*", help="agent names (default with --all: every store)")
+    export_parser.add_argument("--all", action="store_true", help="export every chroma_db_* store")
+    export_parser.add_argument("--output-dir", default=os.path.join("vector_stores", "packs"))
+
+    import_parser = commands.add_parser("import", help="restore stores from .chatpack files")
+    import_parser.add_argument("packs", nargs="+")
+    import_parser.add_argument("--force", action="store_true", help="replace existing stores")
+
+    info_parser = commands.add_parser("info", help="show and verify .chatpack files")
+    info_parser.add_argument("packs", nargs="+")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    if args.command == "export":
+        if args.all:
+            stores = sorted(glob.glob(os.path.join(args.vector_stores_dir, "chroma_db_*")))
+            targets = [(_agent_name_for_store(store), store) for store in stores if os.path.isdir(store)]
+        else:
+            targets = [(name, agent_store_path(args.vector_stores_dir, name)) for name in args.agents]
+        if not targets:
+            parser.error("nothing to export: name agents or pass --all")
+        for agent_name, store in targets:
+            if not os.path.exists(store):
+                parser.error(f"no store for agent '{agent_name}' at {store}")
+            output = os.path.join(args.output_dir, os.path.basename(store).replace("chroma_db_", "", 1) + PACK_EXTENSION)
+            export_store(store, output, agent_name)
+    elif args.command == "import":
+        for pack_path in args.packs:
+            import_pack(pack_path, args.vector_stores_dir, force=args.force)
+    else:
+        for pack_path in args.packs:
+            with PackedIndex(pack_path) as pack:
+                print(f"{pack_path}: agent '{pack.agent_name}', {len(pack)} chunks, "
+                      f"dimension {pack.header['dimension']}, checksums OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
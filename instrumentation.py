@@ -0,0 +1,86 @@
+"""
+LangChain hooks that feed the metrics registry with per-stage timings.
+"""
+
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+
+from metrics import EMBEDDED_TEXTS, record_token_usage, stage_timer, STAGE_LATENCY
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Times LLM and retriever runs inside a chain and records token usage"""
+
+    def __init__(self):
+        self._starts = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, stage):
+        with self._lock:
+            self._starts[run_id] = (stage, time.perf_counter())
+
+    def _finish(self, run_id):
+        with self._lock:
+            entry = self._starts.pop(run_id, None)
+        if entry is not None:
+            stage, start = entry
+            STAGE_LATENCY.observe(time.perf_counter() - start, stage=stage)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, "llm")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, "llm")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id)
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or {}
+        if usage:
+            record_token_usage(
+                llm_output.get("model_name", "unknown"),
+                usage.get("prompt_tokens", 0),
+                usage.get("completion_tokens", 0),
+            )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._start(run_id, "retrieval")
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+
+class TimedEmbeddings(Embeddings):
+    """Embeddings wrapper that records embedding latency and volume"""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts):
+        EMBEDDED_TEXTS.inc(len(texts), kind="document")
+        with stage_timer("embedding"):
+            return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        EMBEDDED_TEXTS.inc(kind="query")
+        with stage_timer("embedding"):
+            return self.embeddings.embed_query(text)
+
+    def embed_queries(self, texts):
+        """Embed many queries in one batched request"""
+        EMBEDDED_TEXTS.inc(len(texts), kind="query")
+        with stage_timer("embedding"):
+            return self.embeddings.embed_documents(texts)
+
+
+# Shared handler passed at call time so it propagates to the chain's child runs
+METRICS_CALLBACK = MetricsCallbackHandler()
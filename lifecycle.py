@@ -0,0 +1,53 @@
+"""
+Startup lifecycle helpers: run warm-up in the background and report readiness
+so a load balancer only routes traffic once the hot set is loaded.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Tracks a background warm-up task for the /readyz endpoint"""
+
+    def __init__(self):
+        self.ready = False
+        self.started_at = None
+        self.finished_at = None
+        self.details = {}
+        self.error = None
+        self._thread = None
+
+    def start(self, warm_up):
+        """Run warm_up() in a daemon thread; its return value is reported as details"""
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, args=(warm_up,), name="warm-up", daemon=True)
+        self._thread.start()
+
+    def _run(self, warm_up):
+        try:
+            self.details = warm_up() or {}
+        except Exception as e:
+            # A failed warm-up should not keep the instance out of rotation forever
+            logger.error("Warm-up failed: %s", e)
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
+            self.ready = True
+            logger.info("Warm-up finished in %.2f seconds", self.finished_at - self.started_at)
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    def status(self):
+        status = {"ready": self.ready, "details": self.details}
+        if self.error:
+            status["error"] = self.error
+        if self.finished_at is not None:
+            status["warmup_seconds"] = self.finished_at - self.started_at
+        return status
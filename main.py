@@ -1,12 +1,26 @@
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 from chatbot import HybridChatbot
+from rate_limit import RateLimitExceeded
+from lifecycle import Readiness
+from profiling import REQUEST_PROFILER
+from admin import admin_router
+import metrics
+import math
 import uvicorn
 import os
 import socket
+import threading
+import logging
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Hybrid Chatbot API")
 
@@ -17,8 +31,28 @@ if not os.path.exists("templates"):
 # Setup templates
 templates = Jinja2Templates(directory="templates")
 
-# Initialize chatbot
-chatbot = HybridChatbot()
+# The chatbot is built on first use, so importing the app and /healthz stay cheap
+_chatbot = None
+_chatbot_lock = threading.Lock()
+
+def get_chatbot():
+    global _chatbot
+    if _chatbot is None:
+        with _chatbot_lock:
+            if _chatbot is None:
+                _chatbot = HybridChatbot()
+    return _chatbot
+
+readiness = Readiness()
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded(request: Request, exc: RateLimitExceeded):
+    """Tell clients to back off instead of returning the error as an answer"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
 
 class Query(BaseModel):
     text: str
@@ -27,22 +61,56 @@ class Query(BaseModel):
 async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
+# Plain def: FastAPI runs it in the threadpool so blocking LLM calls don't stall the event loop
 @app.post("/chat")
-async def chat(query: Query):
+@REQUEST_PROFILER.profiled
+def chat(query: Query):
     try:
-        response = chatbot.get_response(query.text)
+        response = get_chatbot().get_response(query.text)
         return {"response": response}
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/process-documents")
 async def process_documents():
     try:
-        chatbot.process_documents()
+        get_chatbot().process_documents()
         return {"message": "Documents processed successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.on_event("startup")
+async def start_warm_up():
+    """Preload vector stores in the background; /readyz reports when done"""
+    readiness.start(lambda: {"vectorstore_loaded": get_chatbot().warm_up()})
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving HTTP"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: warm-up has finished, route traffic here"""
+    status = readiness.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose request, token, cache and ingestion metrics in Prometheus format"""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+app.include_router(admin_router)
+
 if __name__ == "__main__":
-    print(f"Starting server on port 8000")
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    workers = int(os.getenv("WORKERS", "1"))
+    if workers > 1:
+        # Workers re-import this module, so they share state through the backend set here
+        os.environ.setdefault("STATE_BACKEND_URL", "sqlite:///vector_stores/state.db")
+        logger.info("Starting server on port 8000 with %d workers", workers)
+        uvicorn.run("main:app", host="127.0.0.1", port=8000, workers=workers)
+    else:
+        logger.info("Starting server on port 8000")
+        uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
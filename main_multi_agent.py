@@ -1,12 +1,28 @@
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from multi_agent_chatbot import MultiAgentChatbot
+from typing import List, Literal, Optional
+from multi_agent_chatbot import BATCH_CONCURRENCY, MultiAgentChatbot
+from rate_limit import RateLimitExceeded
+from lifecycle import Readiness
+from profiling import REQUEST_PROFILER
+from admin import admin_router
+import metrics
+import json
+import math
 import uvicorn
 import os
 import socket
+import threading
+import logging
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Multi-Agent PDF Chatbot API")
 
@@ -17,35 +33,93 @@ if not os.path.exists("templates"):
 # Setup templates
 templates = Jinja2Templates(directory="templates")
 
-# Initialize multi-agent chatbot
-multi_agent_chatbot = MultiAgentChatbot()
+# The multi-agent chatbot is built on first use, so importing the app and /healthz stay cheap
+_multi_agent_chatbot = None
+_multi_agent_chatbot_lock = threading.Lock()
+
+def get_chatbot():
+    global _multi_agent_chatbot
+    if _multi_agent_chatbot is None:
+        with _multi_agent_chatbot_lock:
+            if _multi_agent_chatbot is None:
+                _multi_agent_chatbot = MultiAgentChatbot()
+    return _multi_agent_chatbot
+
+readiness = Readiness()
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded(request: Request, exc: RateLimitExceeded):
+    """Tell clients to back off instead of returning the error as an answer"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
 
 class Query(BaseModel):
     text: str
+    # Per-request override of the agent's answer mode (see extractive.py)
+    mode: Optional[Literal["generative", "extractive"]] = None
 
 class AgentQuery(BaseModel):
     agent_name: str
     text: str
 
+class AnswerMode(BaseModel):
+    mode: Literal["generative", "extractive"]
+
+class BatchQuery(BaseModel):
+    items: List[AgentQuery]
+    mode: Optional[Literal["generative", "extractive"]] = None
+    max_concurrency: Optional[int] = None
+
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     return templates.TemplateResponse("multi_agent_index.html", {"request": request})
 
+# Chat endpoints are plain def: FastAPI runs them in the threadpool so blocking
+# LLM calls (and waits for an admission slot) don't stall the event loop
 @app.post("/chat")
-async def chat(query: Query):
+@REQUEST_PROFILER.profiled
+def chat(query: Query):
     """Chat with the multi-agent system - it will try to route to the appropriate agent"""
     try:
-        response = multi_agent_chatbot.get_response(query.text)
+        response = get_chatbot().get_response(query.text, mode=query.mode)
         return {"response": response}
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Declared before /chat/{agent_name} so "batch" is not taken for an agent name
+@app.post("/chat/batch")
+def chat_batch(batch: BatchQuery):
+    """Answer many (agent, question) pairs without conversation memory, streamed as NDJSON"""
+    if len(batch.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+    max_concurrency = max(1, min(batch.max_concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY))
+    results = get_chatbot().answer_batch(
+        [(item.agent_name, item.text) for item in batch.items],
+        mode=batch.mode,
+        max_concurrency=max_concurrency
+    )
+    # One JSON object per line, in completion order; "index" refers to the request's items
+    return StreamingResponse(
+        (json.dumps(result, ensure_ascii=False) + "\n" for result in results),
+        media_type="application/x-ndjson"
+    )
+
 @app.post("/chat/{agent_name}")
-async def chat_with_agent(agent_name: str, query: Query):
+@REQUEST_PROFILER.profiled
+def chat_with_agent(agent_name: str, query: Query):
     """Chat with a specific agent"""
     try:
-        response = multi_agent_chatbot.get_agent_response(agent_name, query.text)
+        response = get_chatbot().get_agent_response(agent_name, query.text, mode=query.mode)
         return {"response": response, "agent": agent_name}
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -53,8 +127,9 @@ async def chat_with_agent(agent_name: str, query: Query):
 async def create_agents():
     """Create agents for all PDF files in the documents directory"""
     try:
-        num_agents = multi_agent_chatbot.create_agents()
-        return {"message": f"Created {num_agents} agents", "agents": multi_agent_chatbot.list_agents()}
+        chatbot = get_chatbot()
+        num_agents = chatbot.create_agents()
+        return {"message": f"Created {num_agents} agents", "agents": chatbot.list_agents()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -62,8 +137,9 @@ async def create_agents():
 async def process_documents():
     """Process documents for all agents"""
     try:
-        multi_agent_chatbot.process_all_documents()
-        return {"message": "All documents processed successfully", "agents": multi_agent_chatbot.list_agents()}
+        chatbot = get_chatbot()
+        dedup = chatbot.process_all_documents()
+        return {"message": "All documents processed successfully", "agents": chatbot.list_agents(), "dedup": dedup}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -71,7 +147,7 @@ async def process_documents():
 async def list_agents():
     """List all available agents and their status"""
     try:
-        agents = multi_agent_chatbot.list_agents()
+        agents = get_chatbot().list_agents()
         return {"agents": agents}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -80,7 +156,7 @@ async def list_agents():
 async def get_agent_status(agent_name: str):
     """Get status of a specific agent"""
     try:
-        status = multi_agent_chatbot.get_agent_status(agent_name)
+        status = get_chatbot().get_agent_status(agent_name)
         return {"agent": status}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -89,15 +165,80 @@ async def get_agent_status(agent_name: str):
 async def process_agent_document(agent_name: str):
     """Process document for a specific agent"""
     try:
-        if agent_name not in multi_agent_chatbot.agents:
+        agent = get_chatbot().get_agent(agent_name)
+        if agent is None:
             raise HTTPException(status_code=404, detail=f"Agent '{agent_name}' not found")
         
-        agent = multi_agent_chatbot.agents[agent_name]
         agent.process_document()
         return {"message": f"Document processed for agent '{agent_name}'", "agent": agent.get_agent_info()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.put("/agents/{agent_name}/answer-mode")
+async def set_agent_answer_mode(agent_name: str, body: AnswerMode):
+    """Set an agent's default answer mode (kept across restarts and shared with other workers)"""
+    try:
+        info = get_chatbot().set_answer_mode(agent_name, body.mode)
+        if info is None:
+            raise HTTPException(status_code=404, detail=f"Agent '{agent_name}' not found")
+        return {"message": f"Answer mode for agent '{agent_name}' set to '{body.mode}'", "agent": info}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def warm_up_and_watch():
+    chatbot = get_chatbot()
+    agents = chatbot.warm_up(
+        max_agents=int(os.getenv("WARMUP_AGENTS", "5")),
+        max_workers=int(os.getenv("WARMUP_WORKERS", "4"))
+    )
+    # Watch after warm-up so the initial scan and the watcher don't ingest the same file
+    if os.getenv("WATCH_DOCUMENTS", "1") != "0":
+        chatbot.start_watching(
+            debounce=float(os.getenv("WATCH_DEBOUNCE", "2")),
+            poll_interval=float(os.getenv("WATCH_POLL_INTERVAL", "5")),
+            backend=os.getenv("WATCH_BACKEND", "auto")
+        )
+    return {"agents": agents}
+
+@app.on_event("startup")
+async def start_warm_up():
+    """Preload vector stores in the background; /readyz reports when done"""
+    readiness.start(warm_up_and_watch)
+
+@app.on_event("shutdown")
+async def stop_watching():
+    if _multi_agent_chatbot is not None:
+        _multi_agent_chatbot.stop_watching()
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving HTTP"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: warm-up has finished, route traffic here"""
+    status = readiness.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose request, token, cache and ingestion metrics in Prometheus format"""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+app.include_router(admin_router)
+
 if __name__ == "__main__":
-    print(f"Starting Multi-Agent Chatbot server on port 8000")
-    uvicorn.run(app, host="127.0.0.1", port=8000) 
\ No newline at end of file
+    workers = int(os.getenv("WORKERS", "1"))
+    if workers > 1:
+        # Workers re-import this module, so they share state through the backend set here
+        os.environ.setdefault("STATE_BACKEND_URL", "sqlite:///vector_stores/state.db")
+        logger.info("Starting Multi-Agent Chatbot server on port 8000 with %d workers", workers)
+        uvicorn.run("main_multi_agent:app", host="127.0.0.1", port=8000, workers=workers)
+    else:
+        logger.info("Starting Multi-Agent Chatbot server on port 8000")
+        uvicorn.run(app, host="127.0.0.1", port=8000) 
\ No newline at end of file
@@ -0,0 +1,306 @@
+"""
+Lightweight Prometheus-style metrics shared by both chatbot servers.
+
+Only the standard library is used so the registry can be imported (and the
+/metrics endpoint served) without loading the LangChain stack.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from sub-millisecond rule checks up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# USD per 1M tokens, used to estimate spend from the token counters
+MODEL_PRICING = {
+    "gpt-4o-mini": {"prompt": 0.15, "completion": 0.60},
+}
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class holding one value per label combination"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric '{self.name}' expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    metric_type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed buckets"""
+
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the wrapped block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def get(self, **labels):
+        """Return (count, sum) for the given labels"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return 0, 0.0
+            return state["count"], state["sum"]
+
+    def _render_sample(self, key, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state["counts"]):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key, ("le", "+Inf"))
+        lines.append(f"{self.name}_bucket{labels} {state['count']}")
+        plain = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{plain} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{plain} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric '{metric.name}' already registered with a different definition")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def reset(self):
+        """Clear all recorded values (mainly for tests and benchmarks)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_LATENCY = REGISTRY.histogram(
+    "chatbot_stage_duration_seconds",
+    "Latency of each request stage (rule_match, condense, retrieval, extractive, embedding, llm, total)",
+    ("stage",),
+)
+RESPONSES = REGISTRY.counter(
+    "chatbot_responses_total",
+    "Responses served, by the component that produced them",
+    ("source",),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "chatbot_llm_tokens_total",
+    "Tokens reported by the LLM provider",
+    ("model", "kind"),
+)
+LLM_COST = REGISTRY.counter(
+    "chatbot_llm_cost_usd_total",
+    "Estimated LLM spend in USD based on MODEL_PRICING",
+    ("model",),
+)
+EMBEDDED_TEXTS = REGISTRY.counter(
+    "chatbot_embedded_texts_total",
+    "Texts sent to the embedding model",
+    ("kind",),
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "chatbot_cache_requests_total",
+    "Cache lookups by cache name and result (hit or miss)",
+    ("cache", "result"),
+)
+INGEST_PAGES = REGISTRY.counter(
+    "chatbot_ingest_pages_total",
+    "PDF pages loaded during ingestion",
+)
+INGEST_CHUNKS = REGISTRY.counter(
+    "chatbot_ingest_chunks_total",
+    "Chunks produced and indexed during ingestion",
+)
+INGEST_DUPLICATES = REGISTRY.counter(
+    "chatbot_ingest_duplicate_chunks_total",
+    "Near-duplicate chunks not embedded again, by action (linked, skipped)",
+    ("action",),
+)
+INGEST_LATENCY = REGISTRY.histogram(
+    "chatbot_ingest_duration_seconds",
+    "Latency of each ingestion stage (load, split, dedup, index, total)",
+    ("stage",),
+)
+
+LIMITER_INFLIGHT = REGISTRY.gauge(
+    "chatbot_llm_inflight_requests",
+    "LLM-backed requests currently holding an admission slot",
+    ("scope",),
+)
+LIMITER_REJECTED = REGISTRY.counter(
+    "chatbot_llm_rejected_total",
+    "Requests rejected by admission control (queue_full, timeout, rate)",
+    ("scope", "reason"),
+)
+LIMITER_WAIT = REGISTRY.histogram(
+    "chatbot_llm_queue_wait_seconds",
+    "Time spent waiting for an admission slot",
+)
+UPSTREAM_RETRIES = REGISTRY.counter(
+    "chatbot_llm_upstream_retries_total",
+    "Retries after the LLM provider answered 429",
+)
+
+
+def stage_timer(stage):
+    """Context manager recording the duration of a request stage"""
+    return STAGE_LATENCY.time(stage=stage)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_token_usage(model, prompt_tokens, completion_tokens):
+    """Update token counters and the estimated cost for one LLM call"""
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+    pricing = MODEL_PRICING.get(model)
+    if pricing is None:
+        # Provider model names often carry a date suffix, e.g. gpt-4o-mini-2024-07-18
+        for name, candidate in MODEL_PRICING.items():
+            if model.startswith(name):
+                pricing = candidate
+                break
+    if pricing:
+        cost = (prompt_tokens * pricing["prompt"] + completion_tokens * pricing["completion"]) / 1_000_000
+        LLM_COST.inc(cost, model=model)
@@ -1,75 +1,211 @@
-from langchain_openai import ChatOpenAI
-from langchain.chains import ConversationalRetrievalChain
-from langchain.memory import ConversationBufferMemory
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
-from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+"""
+Multi-agent PDF chatbot: one PDFAgent per document plus a router.
+
+The LangChain / Chroma / OpenAI stack is imported on first use, not at module
+load, so the rule-based path, agent listing and health checks start fast and
+work without it.
+"""
+
 from rule_based import RuleBasedHandler
+from shared_state import create_state_backend
+from retrieval_pipeline import SPECULATIVE_RETRIEVAL, SpeculativeRetrievalPipeline
+from agent_manifest import agent_store_path, load_manifest, save_manifest
+from document_digest import DOCUMENT_DIGEST, build_digest, match_digest
+from extractive import ANSWER_MODES, DEFAULT_ANSWER_MODE, extract_answer, format_citation
+from page_cache import file_hash, get_page_cache, load_pdf_pages
+from index_pack import import_packs
+from document_watcher import DocumentWatcher
+from chunk_store import ChunkRecord, PageBuffer, to_documents
+from dedup import DEDUP_CHUNKS, CorpusDeduplicator, chunk_id, collapse_duplicates, dedup_report, merge_reports
+from rate_limit import LLM_ADMISSION, RateLimitExceeded, call_with_backoff
+from metrics import INGEST_CHUNKS, INGEST_DUPLICATES, INGEST_LATENCY, INGEST_PAGES, RESPONSES, record_cache, stage_timer
 import os
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 import glob
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Questions of a batch generated at the same time (see MultiAgentChatbot.answer_batch)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Collections a rebuild is written to, and the old index is moved to, before they swap (see PDFAgent.reindex)
+REBUILD_COLLECTION = "langchain_rebuild"
+REPLACED_COLLECTION = "langchain_replaced"
+
 class PDFAgent:
     """Individual agent specialized for a specific PDF document"""
     
-    def __init__(self, pdf_path, agent_name=None, vector_stores_dir="vector_stores"):
+    def __init__(self, pdf_path, agent_name=None, vector_stores_dir="vector_stores", llm=None, embeddings=None, state=None, answer_mode=None, deduplicator=None):
         self.pdf_path = pdf_path
         self.agent_name = agent_name or os.path.splitext(os.path.basename(pdf_path))[0]
         self.vector_stores_dir = vector_stores_dir
-        self.llm = ChatOpenAI(
-            model_name="gpt-4o-mini",
-            temperature=0.7,
-            openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
-        self.embeddings = OpenAIEmbeddings(
-            openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
-        self.memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True
-        )
+        # llm / embeddings can be injected (e.g. the stubs used by the benchmarks);
+        # the defaults are built on first use (see the properties below)
+        self._llm = llm
+        self._base_embeddings = embeddings
+        self._embeddings = None
+        self.chunk_size = 1000
+        self.chunk_overlap = 200
+        self._manifest = None
+        # "extractive" answers lookup questions from the retrieved text without the LLM;
+        # a mode set for this agent (see set_answer_mode) is kept in its manifest
+        self.set_answer_mode(answer_mode or self.get_manifest().get("answer_mode") or DEFAULT_ANSWER_MODE, persist=False)
+        self._text_splitter = None
+        # Near-duplicate chunks are linked to an already embedded copy instead of embedded again
+        if deduplicator is None and DEDUP_CHUNKS:
+            deduplicator = CorpusDeduplicator(vector_stores_dir)
+        self.deduplicator = deduplicator
+        self.dedup_report = None
+        # Parsed pages are reused across re-chunking and store rebuilds
+        self.page_cache = get_page_cache(os.path.join(vector_stores_dir, "page_cache"))
+        # With a shared state backend the conversation and index version are visible to all workers
+        self.state = state
+        self.index_version = None
+        self._last_touch = 0.0
+        # Held while the store is (re)built: the watcher thread and API requests can
+        # process the same agent at once
+        self._ingest_lock = threading.RLock()
+        self._page_buffer = None
+        self._memory = None
         self.vectorstore = None
         self.qa_chain = None
         self.retriever = None
+        self._answer_chain = None
         
         # Ensure vector stores directory exists
         if not os.path.exists(self.vector_stores_dir):
             os.makedirs(self.vector_stores_dir)
         
+    @property
+    def llm(self):
+        if self._llm is None:
+            from langchain_openai import ChatOpenAI
+
+            self._llm = ChatOpenAI(
+                model_name="gpt-4o-mini",
+                temperature=0.7,
+                openai_api_key=os.getenv("OPENAI_API_KEY"),
+                # 429 retries are handled by rate_limit.call_with_backoff
+                max_retries=0
+            )
+        return self._llm
+        
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            from instrumentation import TimedEmbeddings
+
+            base = self._base_embeddings
+            if base is None:
+                from langchain_openai import OpenAIEmbeddings
+
+                base = OpenAIEmbeddings(openai_api_key=os.getenv("OPENAI_API_KEY"))
+            self._embeddings = TimedEmbeddings(base)
+        return self._embeddings
+        
+    @property
+    def text_splitter(self):
+        if self._text_splitter is None:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+            self._text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                length_function=len,
+                # Chunk offsets let retrieval results point into the page buffer instead of copying text
+                add_start_index=True,
+            )
+        return self._text_splitter
+        
+    @property
+    def memory(self):
+        if self._memory is None:
+            from langchain.memory import ConversationBufferMemory
+
+            memory_kwargs = {"memory_key": "chat_history", "return_messages": True}
+            if self.state is not None:
+                from chat_history import SharedChatMessageHistory
+
+                memory_kwargs["chat_memory"] = SharedChatMessageHistory(self.state, f"history:{self.agent_name}")
+            self._memory = ConversationBufferMemory(**memory_kwargs)
+        return self._memory
+        
+    def set_answer_mode(self, mode, persist=True):
+        """Change this agent's default answer mode, saving it in the manifest if the store exists"""
+        if mode not in ANSWER_MODES:
+            raise ValueError(f"Unknown answer mode '{mode}', expected one of {ANSWER_MODES}")
+        self.answer_mode = mode
+        if persist and os.path.exists(self.get_vectorstore_path()):
+            self._update_manifest(answer_mode=mode)
+        
     def get_vectorstore_path(self):
         """Get the path for this agent's vector store"""
-        return os.path.join(self.vector_stores_dir, f"chroma_db_{self.agent_name.replace(' ', '_').replace('-', '_')}")
+        return agent_store_path(self.vector_stores_dir, self.agent_name)
+        
+    def _index_version_key(self):
+        return f"index_version:{self.agent_name}"
+        
+    def _check_index_version(self):
+        """Reopen the vector store (or drop the cached manifest) if another worker re-indexed this agent's document"""
+        if self.state is None:
+            return
+        current = self.state.get(self._index_version_key(), 0)
+        if current != self.index_version:
+            if self.qa_chain is None:
+                # Not loaded yet: only the manifest (and its digest) may be cached
+                self._manifest = None
+                self.index_version = current
+                return
+            logger.info("Vector store for agent '%s' was re-indexed (version %s), reloading", self.agent_name, current)
+            self.load_existing_vectorstore()
         
     def load_existing_vectorstore(self):
         """Load existing vector store if it exists"""
         vectorstore_path = self.get_vectorstore_path()
         if os.path.exists(vectorstore_path):
-            print(f"Loading existing vector store for agent '{self.agent_name}': {vectorstore_path}")
+            logger.info("Loading existing vector store for agent '%s': %s", self.agent_name, vectorstore_path)
+            self._manifest = None
+            self._page_buffer = None
             try:
+                from langchain_community.vectorstores import Chroma
+
                 self.vectorstore = Chroma(
                     persist_directory=vectorstore_path,
                     embedding_function=self.embeddings
                 )
-                self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": 3})
+                self.retriever = self._make_retriever()
                 self._initialize_qa_chain()
-                print(f"Successfully loaded existing vector store for agent '{self.agent_name}'")
+                if self.state is not None:
+                    self.index_version = self.state.get(self._index_version_key(), 0)
+                logger.info("Successfully loaded existing vector store for agent '%s'", self.agent_name)
+                record_cache("vectorstore", True)
                 return True
             except Exception as e:
-                print(f"Error loading vector store for agent '{self.agent_name}': {str(e)}")
+                logger.error("Error loading vector store for agent '%s': %s", self.agent_name, e)
                 return False
+        record_cache("vectorstore", False)
         return False
         
+    def _make_retriever(self):
+        if DEDUP_CHUNKS:
+            from retrievers import CollapsingRetriever
+
+            return CollapsingRetriever(vectorstore=self.vectorstore, k=3)
+        return self.vectorstore.as_retriever(search_kwargs={"k": 3})
+        
     def _initialize_qa_chain(self):
         """Initialize the QA chain with the current retriever"""
+        self.qa_chain = self._build_qa_chain(self.llm, self.retriever, self.memory, retrieve=self.retrieve_chunks)
+        
+    def _build_prompt(self):
+        from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
+
         # Create specialized system prompt for this agent
         system_prompt = f"""คุณคือผู้ช่วยตอบคำถามเกี่ยวกับเอกสาร: {self.agent_name}
         
@@ -78,93 +214,459 @@ class PDFAgent:
 
 เอกสารที่คุณเชี่ยวชาญ: {self.agent_name}"""
 
-        prompt = ChatPromptTemplate.from_messages([
+        return ChatPromptTemplate.from_messages([
             SystemMessagePromptTemplate.from_template(system_prompt),
             HumanMessagePromptTemplate.from_template("Context:\n{context}\n\nQuestion: {question}")
         ])
+        
+    def _build_qa_chain(self, llm, retriever, memory, retrieve=None):
+        """Build this agent's conversational QA chain from the given components"""
+        prompt = self._build_prompt()
+        if SPECULATIVE_RETRIEVAL:
+            return SpeculativeRetrievalPipeline.from_langchain(llm, retriever, prompt, memory, retrieve=retrieve)
+        from langchain.chains import ConversationalRetrievalChain
 
-        self.qa_chain = ConversationalRetrievalChain.from_llm(
-            llm=self.llm,
-            retriever=self.retriever,
-            memory=self.memory,
+        return ConversationalRetrievalChain.from_llm(
+            llm=llm,
+            retriever=retriever,
+            memory=memory,
             combine_docs_chain_kwargs={"prompt": prompt}
         )
         
+    def prefetch(self, query):
+        """Start retrieval for a query ahead of get_response; returns a future or None"""
+        if isinstance(self.qa_chain, SpeculativeRetrievalPipeline):
+            from instrumentation import METRICS_CALLBACK
+
+            return self.qa_chain.prefetch(query, [METRICS_CALLBACK])
+        return None
+        
+    def warm_up(self):
+        """Open the vector store, build the chain and run one query against a stub LLM"""
+        if not self.qa_chain and not self.load_existing_vectorstore():
+            return False
+        self._get_page_buffer()
+        
+        # Query with a stored vector so Chroma loads its index without calling the embedding API
+        sample = self.vectorstore._collection.peek(1)
+        if sample.get("embeddings") is None or len(sample["embeddings"]) == 0:
+            return True
+        from langchain.memory import ConversationBufferMemory
+        from stubs import FixedVectorRetriever, StubChatModel
+
+        retriever = FixedVectorRetriever(
+            vectorstore=self.vectorstore,
+            vector=[float(x) for x in sample["embeddings"][0]]
+        )
+        memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+        chain = self._build_qa_chain(StubChatModel(), retriever, memory)
+        chain({"question": "What is this document about?"})
+        logger.info("Agent '%s' warmed up", self.agent_name)
+        return True
+        
+    def touch(self):
+        """Record that this agent was used, so warm-up can preload recently used agents"""
+        now = time.time()
+        # Throttled: one shared-state write per agent per minute at most
+        if self.state is not None and now - self._last_touch > 60:
+            self._last_touch = now
+            self.state.hset("agents:last_used", self.agent_name, now)
+        
     def process_document(self):
         """Process the specific PDF document for this agent"""
-        # First try to load existing vector store
-        if self.load_existing_vectorstore():
-            print(f"Agent '{self.agent_name}' initialized from existing vector store")
-            return self.vectorstore
+        with self._ingest_lock:
+            self.dedup_report = None
+            # First try to load existing vector store
+            if self.load_existing_vectorstore():
+                if self.is_stale():
+                    logger.info("Document for agent '%s' changed since it was indexed", self.agent_name)
+                    return self.reindex()
+                logger.info("Agent '%s' initialized from existing vector store", self.agent_name)
+                if DOCUMENT_DIGEST and "digest" not in self.get_manifest():
+                    # Stores built before digests existed get one on the next processing run
+                    self._safe_build_digest(load_pdf_pages(self.pdf_path, self.page_cache))
+                return self.vectorstore
             
-        print(f"Processing document for agent '{self.agent_name}': {self.pdf_path}")
+            with INGEST_LATENCY.time(stage="total"):
+                return self._ingest_document()
+
+    def _ingest_document(self, replacing=None):
+        """Build the store from the PDF; a rebuild (replacing the loaded store) is swapped in only on success"""
+        logger.info("Processing document for agent '%s': %s", self.agent_name, self.pdf_path)
         
         # Load the specific PDF
-        loader = PyPDFLoader(self.pdf_path)
-        documents = loader.load()
+        with INGEST_LATENCY.time(stage="load"):
+            documents = load_pdf_pages(self.pdf_path, self.page_cache)
         
         if not documents:
-            print(f"No documents were loaded from {self.pdf_path}")
+            logger.warning("No documents were loaded from %s", self.pdf_path)
             return None
             
-        print(f"Loaded {len(documents)} document chunks from {self.pdf_path}")
+        INGEST_PAGES.inc(len(documents))
+        logger.info("Loaded %d document chunks from %s", len(documents), self.pdf_path)
         
         # Split documents into chunks
-        splits = self.text_splitter.split_documents(documents)
-        print(f"Split into {len(splits)} chunks")
+        with INGEST_LATENCY.time(stage="split"):
+            splits = self.text_splitter.split_documents(documents)
+            for chunk in splits:
+                if chunk.metadata.get("start_index", -1) >= 0:
+                    chunk.metadata["length"] = len(chunk.page_content)
+        logger.info("Split into %d chunks", len(splits))
         
         # Create vector store with unique name for this agent
         vectorstore_path = self.get_vectorstore_path()
-        print(f"Creating vector store: {vectorstore_path}")
+        logger.info("Creating vector store: %s", vectorstore_path)
         
-        self.vectorstore = Chroma.from_documents(
-            documents=splits,
-            embedding=self.embeddings,
-            persist_directory=vectorstore_path
+        with INGEST_LATENCY.time(stage="dedup"):
+            new, linked, skipped = self._plan_chunks(vectorstore_path, splits)
+        
+        from langchain_community.vectorstores import Chroma
+
+        collection_name = {} if replacing is None else {"collection_name": REBUILD_COLLECTION}
+        with INGEST_LATENCY.time(stage="index"):
+            if replacing is not None:
+                # A rebuild interrupted by a crash may have left its collections behind
+                for name in (REBUILD_COLLECTION, REPLACED_COLLECTION):
+                    Chroma(persist_directory=vectorstore_path, collection_name=name).delete_collection()
+            vectorstore = Chroma(
+                persist_directory=vectorstore_path,
+                embedding_function=self.embeddings,
+                **collection_name
+            )
+            try:
+                if new:
+                    vectorstore.add_documents([chunk for _, chunk in new], ids=[i for i, _ in new])
+                num_linked = self._add_linked_chunks(vectorstore, linked)
+                if replacing is not None:
+                    self._swap_collections(replacing, vectorstore)
+            except Exception:
+                if replacing is not None:
+                    # Keep serving (and recording the hash of) the old index; the next change retries
+                    vectorstore.delete_collection()
+                raise
+            vectorstore.persist()
+        self.vectorstore = vectorstore
+        INGEST_CHUNKS.inc(len(splits))
+        INGEST_DUPLICATES.inc(num_linked, action="linked")
+        INGEST_DUPLICATES.inc(len(skipped), action="skipped")
+        self.dedup_report = dedup_report(len(splits), num_linked, len(skipped))
+        logger.info("Agent '%s' dedup: %s", self.agent_name, self.dedup_report)
+        
+        fingerprints = {i: chunk.metadata["simhash"] for i, chunk, *_ in new + linked if "simhash" in chunk.metadata}
+        self._manifest = None
+        if replacing is not None:
+            # Nothing of the replaced index (e.g. its digest) carries over, except settings made for the agent
+            self._manifest = {k: v for k, v in self.get_manifest().items() if k == "answer_mode"}
+        self._update_manifest(
+            pdf_path=self.pdf_path,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            num_pages=len(documents),
+            num_chunks=len(splits),
+            source_sha256=file_hash(self.pdf_path),
+            chunk_offsets=True,
+            created_at=time.time(),
+            dedup=self.dedup_report,
+            fingerprints=fingerprints
         )
-        self.vectorstore.persist()
+        if self.deduplicator is not None:
+            self.deduplicator.register(vectorstore_path, fingerprints)
+        if DOCUMENT_DIGEST:
+            self._safe_build_digest(documents)
+        
+        self._page_buffer = PageBuffer([page.page_content for page in documents])
         
         # Initialize retriever and QA chain
-        self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": 3})
+        self.retriever = self._make_retriever()
         self._initialize_qa_chain()
+        if replacing is not None:
+            replacing.delete_collection()
+        if self.state is not None:
+            # Notify the other workers that this store changed
+            self.index_version = self.state.incr(self._index_version_key())
         
-        print(f"Agent '{self.agent_name}' initialized successfully")
+        logger.info("Agent '%s' initialized successfully", self.agent_name)
         return self.vectorstore
         
-    def get_response(self, query):
-        """Get response from this specific agent"""
+    def is_stale(self):
+        """Whether the PDF changed since the store was built (stores without a recorded hash never are)"""
+        indexed = self.get_manifest().get("source_sha256")
+        return bool(indexed) and os.path.exists(self.pdf_path) and file_hash(self.pdf_path) != indexed
+        
+    def reindex(self):
+        """Rebuild this agent's store from the current PDF, replacing the old chunks and digest"""
+        with self._ingest_lock:
+            if self.vectorstore is None:
+                self.load_existing_vectorstore()
+            # The new chunks go into a separate collection of the same directory (swapping
+            # directories would leave Chroma's open handles on the old one), and the old
+            # store and manifest stay in use until that collection is complete
+            with INGEST_LATENCY.time(stage="total"):
+                return self._ingest_document(replacing=self.vectorstore)
+        
+    def _swap_collections(self, old, new):
+        """Give the rebuilt collection the old one's name, so readers opening the store by default get it"""
+        name = old._collection.name
+        old._collection.modify(name=REPLACED_COLLECTION)
+        try:
+            new._collection.modify(name=name)
+        except Exception:
+            old._collection.modify(name=name)
+            raise
+        
+    def _plan_chunks(self, vectorstore_path, chunks):
+        """Split chunks into new, linked and skipped (see dedup.CorpusDeduplicator.plan)"""
+        if self.deduplicator is None:
+            return [(chunk_id(i), chunk) for i, chunk in enumerate(chunks)], [], []
+        return self.deduplicator.plan(vectorstore_path, chunks)
+        
+    def _add_linked_chunks(self, vectorstore, linked):
+        """Store linked chunks with their source chunk's embedding; returns how many were linked"""
+        from langchain_community.vectorstores import Chroma
+
+        by_source = {}
+        for entry in linked:
+            by_source.setdefault(entry[2][0], []).append(entry)
+        
+        missing = []
+        for source_path, entries in by_source.items():
+            try:
+                source = Chroma(persist_directory=source_path, embedding_function=self.embeddings)
+                stored = source._collection.get(ids=[source_id for _, _, (_, source_id) in entries], include=["embeddings"])
+                embeddings = dict(zip(stored["ids"], stored["embeddings"]))
+            except Exception as e:
+                logger.warning("Could not read embeddings from %s: %s", source_path, e)
+                embeddings = {}
+            found = [(i, chunk, embeddings[source_id]) for i, chunk, (_, source_id) in entries if source_id in embeddings]
+            missing.extend((i, chunk) for i, chunk, (_, source_id) in entries if source_id not in embeddings)
+            if found:
+                vectorstore._collection.upsert(
+                    ids=[i for i, _, _ in found],
+                    embeddings=[[float(x) for x in embedding] for _, _, embedding in found],
+                    documents=[chunk.page_content for _, chunk, _ in found],
+                    metadatas=[chunk.metadata for _, chunk, _ in found]
+                )
+        if missing:
+            # The source store changed since it was fingerprinted: embed these after all
+            vectorstore.add_documents([chunk for _, chunk in missing], ids=[i for i, _ in missing])
+        return len(linked) - len(missing)
+        
+    def get_response(self, query, prefetched=None, mode=None):
+        """Get response from this specific agent; mode overrides the agent's answer mode"""
+        self.touch()
+        # Before the digest, so it is never served from an index another worker replaced
+        self._check_index_version()
+        
+        # Hot questions are answered from the digest built at ingest, without the LLM
+        digest_answer = self.answer_from_digest(query)
+        if digest_answer is not None:
+            if prefetched is not None:
+                prefetched.cancel()
+            self.memory.save_context({"question": query}, {"answer": digest_answer})
+            RESPONSES.inc(source="digest")
+            return digest_answer
+        
         if not self.qa_chain:
             # Try to load existing vector store before giving up
             if not self.load_existing_vectorstore():
+                RESPONSES.inc(source="not_ready")
                 return f"Agent '{self.agent_name}' has not been initialized. Please process the document first."
             
+        if (mode or self.answer_mode) == "extractive":
+            if prefetched is not None:
+                prefetched.cancel()
+            answer, documents = self.answer_extractively(query)
+            if answer is not None:
+                self.memory.save_context({"question": query}, {"answer": answer})
+                RESPONSES.inc(source="extractive")
+                return answer
+            prefetched = None
+            if documents and isinstance(self.qa_chain, SpeculativeRetrievalPipeline):
+                # Not confident enough: generate, reusing the chunks already retrieved
+                prefetched = Future()
+                prefetched.set_result(documents)
+            
+        from instrumentation import METRICS_CALLBACK
+
+        inputs = {"question": query}
+        if prefetched is not None:
+            inputs["prefetched"] = prefetched
         try:
-            response = self.qa_chain({"question": query})
+            with LLM_ADMISSION.slot(self.agent_name):
+                response = call_with_backoff(
+                    lambda: self.qa_chain(inputs, callbacks=[METRICS_CALLBACK])
+                )
+            RESPONSES.inc(source="rag")
             return response["answer"]
+        except RateLimitExceeded:
+            # Surfaced to the API as 429 instead of being returned as an answer
+            RESPONSES.inc(source="rate_limited")
+            raise
         except Exception as e:
-            print(f"Error in agent '{self.agent_name}': {str(e)}")
+            logger.error("Error in agent '%s': %s", self.agent_name, e)
+            RESPONSES.inc(source="error")
             return f"I apologize, but I encountered an error: {str(e)}"
             
+    def _get_page_buffer(self):
+        """The document's pages in one string, if the store recorded chunk offsets for this file version"""
+        if self._page_buffer is None:
+            # False marks a store without usable offsets, so the file is not re-hashed on every query
+            self._page_buffer = False
+            if self.get_manifest().get("chunk_offsets") and not self.is_stale():
+                pages = load_pdf_pages(self.pdf_path, self.page_cache)
+                self._page_buffer = PageBuffer([page.page_content for page in pages])
+        return self._page_buffer or None
+        
+    def retrieve_batch(self, vectors, k=3):
+        """Search the store for many query vectors in one call; returns [(ChunkRecord, relevance)] per query"""
+        fetch_k = k * 2 if DEDUP_CHUNKS else k
+        buffer = self._get_page_buffer()
+        include = ["metadatas", "distances"] if buffer is not None else ["documents", "metadatas", "distances"]
+        with stage_timer("retrieval"):
+            result = self.vectorstore._collection.query(query_embeddings=vectors, n_results=fetch_k, include=include)
+        texts = result.get("documents") or [[None] * len(ids) for ids in result["ids"]]
+        if buffer is not None:
+            texts = self._texts_without_offsets(result, texts)
+        relevance = self.vectorstore._select_relevance_score_fn()
+        batches = []
+        for chunk_texts, metadatas, distances in zip(texts, result["metadatas"], result["distances"]):
+            scored = [
+                (ChunkRecord.from_metadata(metadata, buffer, text), relevance(distance))
+                for text, metadata, distance in zip(chunk_texts, metadatas, distances)
+            ]
+            if DEDUP_CHUNKS:
+                scored = collapse_duplicates(scored, k, document=lambda pair: pair[0])
+            batches.append(scored[:k])
+        return batches
+        
+    def _texts_without_offsets(self, result, texts):
+        # Fetch the text of any hit whose metadata has no offsets into the page buffer
+        missing = {
+            chunk_id
+            for ids, metadatas in zip(result["ids"], result["metadatas"])
+            for chunk_id, metadata in zip(ids, metadatas)
+            if not metadata or "length" not in metadata
+        }
+        if not missing:
+            return texts
+        stored = self.vectorstore._collection.get(ids=list(missing), include=["documents"])
+        by_id = dict(zip(stored["ids"], stored["documents"]))
+        return [[by_id.get(chunk_id) for chunk_id in ids] for ids in result["ids"]]
+        
+    def retrieve_chunks(self, query, callbacks=None, k=3):
+        """Retrieve the top chunks for a query as compact records (the chain's retrieve step)"""
+        return [record for record, _ in self.retrieve_batch([self.embeddings.embed_query(query)], k)[0]]
+        
+    def answer_from_documents(self, query, scored_documents, mode=None):
+        """Answer from already retrieved (document, relevance) pairs, without conversation memory"""
+        if (mode or self.answer_mode) == "extractive":
+            result = extract_answer(query, scored_documents)
+            if result is not None:
+                RESPONSES.inc(source="extractive")
+                return {"answer": result["answer"], "source": "extractive", "citations": [result["citation"]]}
+        
+        from instrumentation import METRICS_CALLBACK
+
+        documents = to_documents(document for document, _ in scored_documents)
+        if self._answer_chain is None:
+            from langchain.chains.question_answering import load_qa_chain
+
+            self._answer_chain = load_qa_chain(self.llm, chain_type="stuff", prompt=self._build_prompt())
+        with LLM_ADMISSION.slot(self.agent_name):
+            result = call_with_backoff(lambda: self._answer_chain.invoke(
+                {"input_documents": documents, "question": query}, config={"callbacks": [METRICS_CALLBACK]}
+            ))
+        answer = result[self._answer_chain.output_key]
+        RESPONSES.inc(source="rag")
+        return {"answer": answer, "source": "rag", "citations": [format_citation(d.metadata) for d in documents]}
+            
+    def get_manifest(self):
+        """Get this agent's manifest (cached), or an empty dict if there is none"""
+        if self._manifest is None:
+            self._manifest = load_manifest(self.get_vectorstore_path()) or {}
+        return self._manifest
+        
+    def _update_manifest(self, **fields):
+        self._manifest = save_manifest(self.get_vectorstore_path(), dict(self.get_manifest(), **fields))
+        
+    def build_digest(self, pages):
+        """Precompute the summary, outline and likely Q&A pairs and store them in the manifest"""
+        from instrumentation import METRICS_CALLBACK
+
+        with INGEST_LATENCY.time(stage="digest"):
+            digest = call_with_backoff(lambda: build_digest(
+                self.llm,
+                [page.page_content for page in pages],
+                self.agent_name,
+                callbacks=[METRICS_CALLBACK]
+            ))
+        self._update_manifest(digest=digest)
+        logger.info("Built digest for agent '%s' with %d FAQ entries", self.agent_name, len(digest["faq"]))
+        return digest
+        
+    def _safe_build_digest(self, pages):
+        # The digest is an optimization; a failure must not fail ingestion
+        try:
+            self.build_digest(pages)
+        except Exception as e:
+            logger.error("Could not build digest for agent '%s': %s", self.agent_name, e)
+        
+    def answer_from_digest(self, query):
+        """Answer from the precomputed digest, or None if the query needs retrieval"""
+        answer = match_digest(query, self.get_manifest().get("digest"))
+        record_cache("digest", answer is not None)
+        return answer
+        
+    def answer_extractively(self, query, k=3):
+        """Return (answer with page citation or None, retrieved documents) without calling the LLM"""
+        try:
+            with stage_timer("extractive"):
+                scored = self.retrieve_batch([self.embeddings.embed_query(query)], k)[0]
+                result = extract_answer(query, scored)
+        except Exception as e:
+            logger.warning("Extractive answer failed for agent '%s', falling back to generation: %s", self.agent_name, e)
+            return None, []
+        record_cache("extractive", result is not None)
+        return (result["answer"] if result else None), [document for document, _ in scored]
+        
     def get_agent_info(self):
         """Get information about this agent"""
         vectorstore_path = self.get_vectorstore_path()
         is_initialized = self.qa_chain is not None or os.path.exists(vectorstore_path)
+        digest = self.get_manifest().get("digest") or {}
         
         return {
             "name": self.agent_name,
             "pdf_path": self.pdf_path,
             "is_initialized": is_initialized,
             "vectorstore_path": vectorstore_path,
-            "has_vectorstore": os.path.exists(vectorstore_path)
+            "has_vectorstore": os.path.exists(vectorstore_path),
+            "summary": digest.get("summary"),
+            "outline": digest.get("outline", []),
+            "faq_count": len(digest.get("faq", [])),
+            "answer_mode": self.answer_mode,
+            "dedup": self.get_manifest().get("dedup")
         }
 
 class MultiAgentChatbot:
     """Main chatbot that manages multiple PDF agents"""
     
-    def __init__(self, documents_dir="documents", vector_stores_dir="vector_stores"):
+    def __init__(self, documents_dir="documents", vector_stores_dir="vector_stores", llm=None, embeddings=None, state=None):
         self.documents_dir = documents_dir
         self.vector_stores_dir = vector_stores_dir
+        self.llm = llm
+        self.embeddings = embeddings
+        # Agent registry shared across workers (see shared_state.py)
+        self.state = state or create_state_backend()
+        self._registry_version = None
+        # One fingerprint index for the whole corpus, shared by all agents
+        self.deduplicator = CorpusDeduplicator(vector_stores_dir) if DEDUP_CHUNKS else None
+        self.last_dedup_report = None
+        self.watcher = None
         self.agents = {}
+        # Guards changes to self.agents, which the watcher thread makes concurrently with
+        # requests; readers iterate over a snapshot (list(self.agents.items()))
+        self._agents_lock = threading.RLock()
         self.rule_handler = RuleBasedHandler()
         
         # Ensure directories exist
@@ -174,13 +676,52 @@ class MultiAgentChatbot:
     def discover_pdfs(self):
         """Discover all PDF files in the documents directory"""
         if not os.path.exists(self.documents_dir):
-            print(f"Documents directory not found: {self.documents_dir}")
+            logger.warning("Documents directory not found: %s", self.documents_dir)
             return []
             
         pdf_files = glob.glob(os.path.join(self.documents_dir, "*.pdf"))
-        print(f"Found {len(pdf_files)} PDF files: {[os.path.basename(f) for f in pdf_files]}")
+        logger.info("Found %d PDF files: %s", len(pdf_files), [os.path.basename(f) for f in pdf_files])
         return pdf_files
         
+    def _new_agent(self, pdf_path, agent_name, answer_mode=None):
+        """Create a PDFAgent sharing this chatbot's directories and injected models"""
+        if answer_mode is None:
+            # A mode set through set_answer_mode on any worker is kept in the registry entry
+            answer_mode = (self.state.hget("agents", agent_name) or {}).get("answer_mode")
+        return PDFAgent(pdf_path, agent_name, self.vector_stores_dir, llm=self.llm, embeddings=self.embeddings,
+                        state=self.state, answer_mode=answer_mode, deduplicator=self.deduplicator)
+        
+    def _register_agents(self):
+        """Publish the local agents to the shared registry"""
+        with self._agents_lock:
+            registry = self.state.hgetall("agents")
+            for agent_name, agent in self.agents.items():
+                self.state.hset("agents", agent_name, dict(registry.get(agent_name) or {}, pdf_path=agent.pdf_path))
+            self._registry_version = self.state.incr("agents:version")
+        
+    def _claim(self, key):
+        """True for exactly one worker sharing the state backend"""
+        return self.state.incr(key) == 1
+        
+    def sync_agents(self):
+        """Pick up agents registered or retired by other workers"""
+        version = self.state.get("agents:version", 0)
+        if version == self._registry_version:
+            return
+        with self._agents_lock:
+            registry = self.state.hgetall("agents")
+            for agent_name, entry in registry.items():
+                if agent_name not in self.agents:
+                    self.agents[agent_name] = self._new_agent(entry["pdf_path"], agent_name, entry.get("answer_mode"))
+                    logger.info("Loaded agent from shared registry: %s", agent_name)
+                elif entry.get("answer_mode"):
+                    self.agents[agent_name].answer_mode = entry["answer_mode"]
+            for agent_name in list(self.agents):
+                if agent_name not in registry:
+                    del self.agents[agent_name]
+                    logger.info("Agent retired by another worker: %s", agent_name)
+            self._registry_version = version
+        
     def discover_existing_agents(self):
         """Discover agents from existing vector stores"""
         existing_agents = {}
@@ -203,8 +744,8 @@ class MultiAgentChatbot:
                     break
             
             if pdf_path:
-                existing_agents[agent_name] = PDFAgent(pdf_path, agent_name, self.vector_stores_dir)
-                print(f"Discovered existing agent: {agent_name}")
+                existing_agents[agent_name] = self._new_agent(pdf_path, agent_name)
+                logger.info("Discovered existing agent: %s", agent_name)
                 
         return existing_agents
         
@@ -214,32 +755,58 @@ class MultiAgentChatbot:
         
         # First, try to load existing agents from vector stores
         existing_agents = self.discover_existing_agents()
-        self.agents.update(existing_agents)
-        
-        # Then create new agents for PDFs that don't have existing vector stores
-        for pdf_path in pdf_files:
-            agent_name = os.path.splitext(os.path.basename(pdf_path))[0]
-            if agent_name not in self.agents:
-                self.agents[agent_name] = PDFAgent(pdf_path, agent_name, self.vector_stores_dir)
-                print(f"Created new agent: {agent_name}")
+        with self._agents_lock:
+            self.agents.update(existing_agents)
             
+            # Then create new agents for PDFs that don't have existing vector stores
+            for pdf_path in pdf_files:
+                agent_name = os.path.splitext(os.path.basename(pdf_path))[0]
+                if agent_name not in self.agents:
+                    self.agents[agent_name] = self._new_agent(pdf_path, agent_name)
+                    logger.info("Created new agent: %s", agent_name)
+                
+            self._register_agents()
         return len(self.agents)
         
     def process_all_documents(self):
         """Process documents for all agents"""
-        print("Processing documents for all agents...")
+        self.sync_agents()
+        logger.info("Processing documents for all agents...")
         
-        for agent_name, agent in self.agents.items():
-            print(f"\n--- Processing agent: {agent_name} ---")
+        reports = []
+        for agent_name, agent in list(self.agents.items()):
+            logger.info("--- Processing agent: %s ---", agent_name)
             agent.process_document()
+            if agent.dedup_report is not None:
+                reports.append(agent.dedup_report)
             
-        print(f"\nAll {len(self.agents)} agents have been processed")
+        logger.info("All %d agents have been processed", len(self.agents))
+        if reports:
+            self.last_dedup_report = merge_reports(reports)
+            logger.info("Ingested %d chunks, %.1f%% deduplicated (%d linked, %d skipped)",
+                        self.last_dedup_report["chunks"], 100 * self.last_dedup_report["ratio"],
+                        self.last_dedup_report["linked"], self.last_dedup_report["skipped"])
+        return self.last_dedup_report
         
-    def get_response(self, query):
+    def get_response(self, query, mode=None):
         """Get response using hybrid approach with agent selection"""
+        with stage_timer("total"):
+            return self._route_response(query, mode)
+
+    def _route_response(self, query, mode=None):
+        self.sync_agents()
+        
+        # Pick the mentioned agent first (cheap) so its retrieval runs while the rules are checked
+        agent = next((a for name, a in list(self.agents.items()) if name.lower() in query.lower()), None)
+        prefetched = agent.prefetch(query) if agent is not None else None
+        
         # First, try rule-based response
-        rule_response = self.rule_handler.get_response(query)
+        with stage_timer("rule_match"):
+            rule_response = self.rule_handler.get_response(query)
         if rule_response:
+            if prefetched is not None:
+                prefetched.cancel()
+            RESPONSES.inc(source="rule")
             return rule_response
             
         # If no rule matches, try to determine which agent should handle the query
@@ -247,38 +814,238 @@ class MultiAgentChatbot:
         # In a more sophisticated system, you could use an LLM to route queries
         
         if not self.agents:
+            RESPONSES.inc(source="not_ready")
             return "No agents available. Please create agents first."
             
         # Check if query mentions a specific agent
-        for agent_name in self.agents.keys():
-            if agent_name.lower() in query.lower():
-                agent = self.agents[agent_name]
-                return agent.get_response(query)
+        if agent is not None:
+            return agent.get_response(query, prefetched=prefetched, mode=mode)
                 
         # If no specific agent mentioned, return list of available agents
-        available_agents = list(self.agents.keys())
+        RESPONSES.inc(source="routing")
+        available_agents = list(self.agents)
         return f"""I found multiple specialized agents. Please specify which document you're asking about:
 
 Available agents: {', '.join(available_agents)}
 
 You can mention the agent name in your question, or ask about a specific document."""
         
-    def get_agent_response(self, agent_name, query):
+    def answer_batch(self, items, mode=None, max_concurrency=BATCH_CONCURRENCY):
+        """Answer (agent_name, question) pairs statelessly, yielding results as they complete
+        
+        All questions are embedded in one call, each agent's store is searched once for all
+        of its questions, and answers are generated with at most max_concurrency in flight.
+        Results carry the item's index; failures are reported per item under "error",
+        including a failed embedding call (every item) or store search (that agent's items).
+        """
+        self.sync_agents()
+        by_agent, batch_agents = {}, {}
+        for index, (agent_name, question) in enumerate(items):
+            agent = batch_agents.get(agent_name) or self.agents.get(agent_name)
+            if agent is None:
+                yield {"index": index, "agent": agent_name, "question": question, "error": f"Agent '{agent_name}' not found"}
+            elif agent.vectorstore is None and not agent.load_existing_vectorstore():
+                yield {"index": index, "agent": agent_name, "question": question,
+                       "error": f"Agent '{agent_name}' has not been initialized. Please process the document first."}
+            else:
+                batch_agents[agent_name] = agent
+                by_agent.setdefault(agent_name, []).append((index, question))
+        if not by_agent:
+            return
+        
+        # One embedding request for every distinct question (all agents share the embedding model)
+        questions = list(dict.fromkeys(question for entries in by_agent.values() for _, question in entries))
+        embeddings = batch_agents[next(iter(by_agent))].embeddings
+        try:
+            vectors = dict(zip(questions, call_with_backoff(lambda: embeddings.embed_queries(questions))))
+        except Exception as e:
+            logger.error("Batch embedding of %d questions failed: %s", len(questions), e)
+            for agent_name, entries in by_agent.items():
+                yield from self._batch_errors(agent_name, entries, e)
+            return
+        
+        tasks = []
+        for agent_name, entries in by_agent.items():
+            agent = batch_agents[agent_name]
+            try:
+                results = agent.retrieve_batch([vectors[question] for _, question in entries])
+            except Exception as e:
+                logger.error("Batch retrieval for agent '%s' failed: %s", agent_name, e)
+                yield from self._batch_errors(agent_name, entries, e)
+                continue
+            tasks.extend((agent, index, question, scored) for (index, question), scored in zip(entries, results))
+        
+        pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="batch")
+        try:
+            futures = {
+                pool.submit(agent.answer_from_documents, question, scored, mode): (agent.agent_name, index, question)
+                for agent, index, question, scored in tasks
+            }
+            for future in as_completed(futures):
+                agent_name, index, question = futures[future]
+                result = {"index": index, "agent": agent_name, "question": question}
+                try:
+                    result.update(future.result())
+                except Exception as e:
+                    logger.error("Batch item %d for agent '%s' failed: %s", index, agent_name, e)
+                    RESPONSES.inc(source="error")
+                    result["error"] = str(e)
+                yield result
+        finally:
+            # Stop queued generations if the consumer goes away (e.g. the client disconnects)
+            pool.shutdown(wait=False, cancel_futures=True)
+        
+    def _batch_errors(self, agent_name, entries, error):
+        """Error results for (index, question) entries that failed before generation"""
+        for index, question in entries:
+            RESPONSES.inc(source="error")
+            yield {"index": index, "agent": agent_name, "question": question, "error": str(error)}
+        
+    def get_agent_response(self, agent_name, query, mode=None):
         """Get response from a specific agent"""
-        if agent_name not in self.agents:
-            return f"Agent '{agent_name}' not found. Available agents: {list(self.agents.keys())}"
+        self.sync_agents()
+        agent = self.agents.get(agent_name)
+        if agent is None:
+            return f"Agent '{agent_name}' not found. Available agents: {list(self.agents)}"
             
-        return self.agents[agent_name].get_response(query)
+        with stage_timer("total"):
+            return agent.get_response(query, mode=mode)
+        
+    def set_answer_mode(self, agent_name, mode):
+        """Set an agent's default answer mode on every worker; returns its info, or None if it doesn't exist"""
+        self.sync_agents()
+        agent = self.agents.get(agent_name)
+        if agent is None:
+            return None
+        agent.set_answer_mode(mode)
+        with self._agents_lock:
+            entry = self.state.hget("agents", agent_name) or {"pdf_path": agent.pdf_path}
+            self.state.hset("agents", agent_name, dict(entry, answer_mode=mode))
+            self._registry_version = self.state.incr("agents:version")
+        return agent.get_agent_info()
+        
+    def handle_document_change(self, pdf_path):
+        """Ingest one new or edited PDF and register its agent, without rescanning the others"""
+        self.sync_agents()
+        agent_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        agent = self.agents.get(agent_name)
+        is_new = agent is None
+        if is_new:
+            agent = self._new_agent(pdf_path, agent_name)
+        claim = None
+        has_store = os.path.exists(agent.get_vectorstore_path())
+        if has_store and not agent.is_stale():
+            if not is_new:
+                return False
+        else:
+            # With several workers watching the same directory only one of them ingests;
+            # the others pick the agent up through the registry and the index version
+            stat = os.stat(pdf_path)
+            claim = f"ingest:{agent_name}:{stat.st_size}:{stat.st_mtime_ns}"
+            if not self._claim(claim):
+                return False
+        
+        logger.info("Document %s %s", pdf_path, "added" if is_new else "changed")
+        try:
+            # Loads an up-to-date store, rebuilds a stale one, or ingests the PDF for the first time
+            agent.process_document()
+        except Exception:
+            if claim is not None:
+                # Let this or another worker retry the same file version
+                self.state.delete(claim)
+            raise
+        if is_new:
+            with self._agents_lock:
+                self.agents[agent_name] = agent
+                self.state.hset("agents", agent_name, dict(self.state.hget("agents", agent_name) or {}, pdf_path=pdf_path))
+                self._registry_version = self.state.incr("agents:version")
+        return True
+        
+    def handle_document_removed(self, pdf_path):
+        """Retire the agent of a deleted PDF; its store is kept in case the file comes back"""
+        self.sync_agents()
+        agent_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        with self._agents_lock:
+            if self.agents.pop(agent_name, None) is None:
+                return False
+            self.state.hdel("agents", agent_name)
+            self._registry_version = self.state.incr("agents:version")
+        logger.info("Document %s removed, retired agent '%s'", pdf_path, agent_name)
+        return True
+        
+    def start_watching(self, debounce=2.0, poll_interval=5.0, backend="auto"):
+        """Ingest new and edited PDFs and retire deleted ones as the documents directory changes"""
+        if self.watcher is None or not self.watcher.running:
+            self.watcher = DocumentWatcher(
+                self.documents_dir,
+                self.handle_document_change,
+                self.handle_document_removed,
+                debounce=debounce,
+                poll_interval=poll_interval,
+                backend=backend
+            ).start()
+        return self.watcher
+        
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        
+    def import_packs(self, packs_dir=None):
+        """Restore stores shipped as packed index files (see index_pack.py) that don't exist yet"""
+        packs_dir = packs_dir or os.path.join(self.vector_stores_dir, "packs")
+        if not os.path.isdir(packs_dir):
+            return []
+        imported = import_packs(packs_dir, self.vector_stores_dir)
+        if imported:
+            logger.info("Imported %d packed indexes from %s", len(imported), packs_dir)
+        return imported
+        
+    def warm_up(self, max_agents=5, max_workers=4):
+        """Discover agents and preload the most recently used ones in parallel"""
+        self.import_packs()
+        self.create_agents()
+        last_used = self.state.hgetall("agents:last_used")
+        candidates = [agent for agent in list(self.agents.values()) if os.path.exists(agent.get_vectorstore_path())]
+        # Never-used agents fall back to the age of their vector store
+        candidates.sort(
+            key=lambda agent: last_used.get(agent.agent_name) or os.path.getmtime(agent.get_vectorstore_path()),
+            reverse=True
+        )
+        hot_set = candidates[:max_agents]
+        logger.info("Warming up %d of %d agents: %s", len(hot_set), len(self.agents), [a.agent_name for a in hot_set])
+        
+        loaded = []
+        if not hot_set:
+            return loaded
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(agent.warm_up): agent.agent_name for agent in hot_set}
+            for future in as_completed(futures):
+                agent_name = futures[future]
+                try:
+                    if future.result():
+                        loaded.append(agent_name)
+                except Exception as e:
+                    logger.error("Warm-up failed for agent '%s': %s", agent_name, e)
+        return loaded
+        
+    def get_agent(self, agent_name):
+        """Get a specific agent, or None if it does not exist"""
+        self.sync_agents()
+        return self.agents.get(agent_name)
         
     def list_agents(self):
         """List all available agents and their status"""
+        self.sync_agents()
         agent_info = {}
-        for agent_name, agent in self.agents.items():
+        for agent_name, agent in list(self.agents.items()):
             agent_info[agent_name] = agent.get_agent_info()
         return agent_info
         
     def get_agent_status(self, agent_name):
         """Get status of a specific agent"""
-        if agent_name not in self.agents:
+        self.sync_agents()
+        agent = self.agents.get(agent_name)
+        if agent is None:
             return {"error": f"Agent '{agent_name}' not found"}
-        return self.agents[agent_name].get_agent_info() 
\ No newline at end of file
+        return agent.get_agent_info() 
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""
+On-disk cache of parsed PDF pages, keyed by the file's content hash.
+
+PDF parsing is the CPU-heavy part of ingestion. Each parsed file is stored as
+gzip-compressed JSON lines (a header line, then one line per page), so
+rebuilding a store or re-chunking with other settings streams the text back
+instead of parsing the PDF again. A changed file has a new hash and is parsed
+again; renaming or copying a file does not. Whenever a file is parsed, entries
+of files that were deleted or changed since they were cached are removed, so
+the cache holds one entry per current document.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+# Set PAGE_CACHE=0 to always parse PDFs
+PAGE_CACHE = os.getenv("PAGE_CACHE", "1") != "0"
+# By default the cache lives next to the vector stores it feeds
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR")
+
+CACHE_VERSION = 1
+
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 of the file contents, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PageCache:
+    """Parsed page text and metadata per file version, as gzip JSON lines"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        # (path, size, mtime) -> content hash, so unchanged files are not re-hashed
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def _content_hash(self, path):
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._hashes.get(key)
+        if digest is None:
+            digest = file_hash(path)
+            with self._lock:
+                self._hashes[key] = digest
+        return digest
+
+    def entry_path(self, path):
+        return os.path.join(self.cache_dir, f"{self._content_hash(path)}.jsonl.gz")
+
+    def get(self, path):
+        """Stream (page_content, metadata) pairs for this file version, or return None on a miss"""
+        entry = self.entry_path(path)
+        if not os.path.exists(entry):
+            record_cache("page_cache", False)
+            return None
+        record_cache("page_cache", True)
+        return self._read(entry, path)
+
+    def _read(self, entry, path):
+        with gzip.open(entry, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CACHE_VERSION:
+                raise ValueError(f"Unsupported page cache version in {entry}")
+            for line in f:
+                page = json.loads(line)
+                # The same content may now live at another path
+                yield page["text"], dict(page["metadata"], source=path)
+
+    def put(self, path, pages):
+        """Store (page_content, metadata) pairs for this file version"""
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+        entry = self.entry_path(path)
+        tmp_path = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(json.dumps({"version": CACHE_VERSION, "source": path}) + "\n")
+            for text, metadata in pages:
+                f.write(json.dumps({"text": text, "metadata": metadata}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, entry)
+
+    def prune(self):
+        """Remove entries whose source file no longer exists or has changed; returns how many"""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".jsonl.gz"):
+                continue
+            entry = os.path.join(self.cache_dir, name)
+            try:
+                with gzip.open(entry, "rt", encoding="utf-8") as f:
+                    source = json.loads(f.readline()).get("source")
+                current = os.path.exists(source) and self._content_hash(source) == name[:-len(".jsonl.gz")]
+                if not current:
+                    os.remove(entry)
+                    removed += 1
+            except (OSError, EOFError, ValueError, TypeError) as e:
+                logger.warning("Could not check page cache entry %s: %s", entry, e)
+        if removed:
+            logger.info("Removed %d outdated page cache entries", removed)
+        return removed
+
+    def load(self, path, parse):
+        """Cached pages of the file, calling parse(path) -> [(page_content, metadata)] on a miss"""
+        cached = self.get(path)
+        if cached is not None:
+            try:
+                return list(cached)
+            except (OSError, EOFError, ValueError, KeyError) as e:
+                logger.warning("Ignoring unreadable page cache entry for %s: %s", path, e)
+        pages = parse(path)
+        try:
+            self.put(path, pages)
+        except OSError as e:
+            # The cache is an optimization; parsing already succeeded
+            logger.warning("Could not write page cache for %s: %s", path, e)
+        # A (re-)parsed file is when old versions become garbage
+        self.prune()
+        return pages
+
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_page_cache(default_dir):
+    """Shared cache for a directory (PAGE_CACHE_DIR overrides it), or None if caching is disabled"""
+    if not PAGE_CACHE:
+        return None
+    cache_dir = PAGE_CACHE_DIR or default_dir
+    with _CACHES_LOCK:
+        if cache_dir not in _CACHES:
+            _CACHES[cache_dir] = PageCache(cache_dir)
+        return _CACHES[cache_dir]
+
+
+def _parse_pdf(path):
+    from langchain_community.document_loaders import PyPDFLoader
+
+    return [(page.page_content, page.metadata) for page in PyPDFLoader(path).load()]
+
+
+def load_pdf_pages(path, cache=None):
+    """Load a PDF as LangChain Documents, one per page, parsing it only once per file version"""
+    from langchain_core.documents import Document
+
+    pages = cache.load(path, _parse_pdf) if cache is not None else _parse_pdf(path)
+    return [Document(page_content=text, metadata=metadata) for text, metadata in pages]
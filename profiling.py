@@ -0,0 +1,232 @@
+"""
+On-demand request profiling for both chatbot servers.
+
+An admin turns profiling on for a sample of requests, a window of N seconds
+or both; each sampled request runs under cProfile and the results are merged
+into one pstats report, available as text, a binary pstats dump or collapsed
+stacks for flamegraph tools.
+
+Only endpoints wrapped with REQUEST_PROFILER.profiled are sampled. The wrapper
+runs inside the request's worker thread, which is the thread cProfile records;
+work handed to other threads (speculative retrieval, batch generation) shows
+up only as the time spent waiting for it. Without ADMIN_TOKEN the decorator
+returns the endpoint unchanged, so there is no overhead at all; with it and
+profiling off, the cost is one attribute check per request. The toggle is per
+worker process. The /admin/profiling routes that control it are in admin.py.
+"""
+
+import cProfile
+import functools
+import hmac
+import io
+import logging
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Profiling endpoints are only enabled when an admin token is configured
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+REPORT_FORMATS = ("text", "collapsed", "pstats")
+
+
+def is_admin(token):
+    """True if token matches ADMIN_TOKEN (always False when no token is configured)"""
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8"))
+
+
+def _frame_label(func):
+    filename, line, name = func
+    if filename == "~":
+        # Built-ins are reported as ('~', 0, '<built-in method ...>')
+        return name.replace(";", ":")
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ":")
+
+
+def collapsed_stacks(stats, min_us=1, max_depth=64):
+    """Flamegraph collapsed-stack lines ("a;b;c microseconds") approximated from a pstats call graph
+
+    cProfile keeps caller -> callee totals, not full stacks, so each callee's
+    time is split across its callers in proportion to the time each caller
+    spent in it.
+    """
+    entries = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    totals = {}
+
+    def walk(func, stack, seen, share):
+        tt = entries[func][2]
+        stack = stack + (_frame_label(func),)
+        self_us = tt * share * 1e6
+        if self_us >= min_us:
+            key = ";".join(stack)
+            totals[key] = totals.get(key, 0) + self_us
+        if len(stack) >= max_depth:
+            return
+        for child, edge_ct in callees.get(func, ()):
+            child_ct = entries[child][3]
+            if child in seen or child_ct <= 0:
+                continue
+            child_share = share * edge_ct / child_ct
+            # Skip branches too small to show up
+            if child_ct * child_share * 1e6 >= min_us:
+                walk(child, stack, seen | {child}, child_share)
+
+    for func, (_, _, _, _, callers) in entries.items():
+        if not callers:
+            walk(func, (), {func}, 1.0)
+    return [f"{stack} {int(round(us))}" for stack, us in sorted(totals.items()) if round(us) > 0]
+
+
+class RequestProfiler:
+    """Samples requests into a merged cProfile report while a profiling session is active"""
+
+    def __init__(self, enabled=None):
+        self.enabled = bool(ADMIN_TOKEN) if enabled is None else enabled
+        self.active = False
+        self._lock = threading.Lock()
+        # cProfile can only profile one request at a time on Python 3.12+
+        self._busy = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._stats = None
+        self.session = {}
+        self.profiled_requests = 0
+        self.skipped_requests = 0
+        self.profiled_seconds = 0.0
+
+    def start(self, sample_rate=1.0, duration=None, max_requests=None):
+        """Start a new session, discarding the previous report"""
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        if duration is not None and duration <= 0:
+            raise ValueError("duration must be positive")
+        if max_requests is not None and max_requests <= 0:
+            raise ValueError("max_requests must be positive")
+        now = time.time()
+        with self._lock:
+            self._reset()
+            self.session = {
+                "started_at": now,
+                "expires_at": now + duration if duration else None,
+                "sample_rate": sample_rate,
+                "max_requests": max_requests,
+            }
+            self.active = True
+        logger.info("Profiling started: %s", self.session)
+        return self.status()
+
+    def stop(self):
+        """End the session; the report stays available until the next start"""
+        with self._lock:
+            if self.active:
+                self.active = False
+                self.session["stopped_at"] = time.time()
+                logger.info("Profiling stopped after %d requests", self.profiled_requests)
+        return self.status()
+
+    def status(self):
+        return {
+            "enabled": self.enabled,
+            "active": self.active,
+            "session": dict(self.session),
+            "profiled_requests": self.profiled_requests,
+            "skipped_requests": self.skipped_requests,
+            "profiled_seconds": self.profiled_seconds,
+        }
+
+    def _should_profile(self):
+        session = self.session
+        if session.get("expires_at") and time.time() >= session["expires_at"]:
+            self.stop()
+            return False
+        return random.random() < session.get("sample_rate", 1.0)
+
+    def profiled(self, fn):
+        """Decorator for sync endpoints; returns fn itself when profiling is not enabled"""
+        if not self.enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self.active or not self._should_profile():
+                return fn(*args, **kwargs)
+            if not self._busy.acquire(blocking=False):
+                with self._lock:
+                    self.skipped_requests += 1
+                return fn(*args, **kwargs)
+            try:
+                return self._run(fn, args, kwargs)
+            finally:
+                self._busy.release()
+
+        return wrapper
+
+    def _run(self, fn, args, kwargs):
+        session = self.session
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) is active
+            with self._lock:
+                self.skipped_requests += 1
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._add(session, profile, time.perf_counter() - start)
+
+    def _add(self, session, profile, elapsed):
+        with self._lock:
+            # Requests still running when their session ended are dropped
+            if not self.active or session is not self.session:
+                return
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+            self.profiled_requests += 1
+            self.profiled_seconds += elapsed
+            max_requests = self.session.get("max_requests")
+        if max_requests and self.profiled_requests >= max_requests:
+            self.stop()
+
+    def report(self, fmt="text", sort="cumulative", limit=50):
+        """The merged report as text (pstats listing), collapsed stacks, or bytes (a pstats dump)"""
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format '{fmt}', expected one of {REPORT_FORMATS}")
+        with self._lock:
+            stats = self._stats
+            if stats is None:
+                return b"" if fmt == "pstats" else ""
+            if fmt == "pstats":
+                # Same bytes as Stats.dump_stats: load with pstats.Stats(path) or snakeviz
+                return marshal.dumps(stats.stats)
+            if fmt == "collapsed":
+                return "\n".join(collapsed_stacks(stats)) + "\n"
+            out = io.StringIO()
+            stats.stream = out
+            try:
+                stats.sort_stats(sort)
+            except KeyError:
+                raise ValueError(f"Unknown sort key '{sort}'")
+            stats.print_stats(limit)
+            return out.getvalue()
+
+
+# Shared by the endpoints of one server process
+REQUEST_PROFILER = RequestProfiler()
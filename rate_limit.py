@@ -0,0 +1,213 @@
+"""
+Admission control for LLM calls: token-bucket rate limits, bounded
+concurrency with a bounded wait queue (per agent and global), and jittered
+exponential backoff when the upstream provider answers 429.
+
+Limits are configured through environment variables (see LLMAdmission.from_env)
+and apply per worker process.
+"""
+
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import LIMITER_INFLIGHT, LIMITER_REJECTED, LIMITER_WAIT, UPSTREAM_RETRIES
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request cannot be admitted; maps to HTTP 429 with Retry-After"""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = max(1.0, float(retry_after))
+
+
+class TokenBucket:
+    """Classic token bucket; reservations may push the balance negative"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1, max_wait=0.0):
+        """Reserve tokens and return how long the caller must wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            wait = (tokens - self._tokens) / self.rate
+            if wait > max_wait:
+                raise RateLimitExceeded("Rate limit exceeded", retry_after=wait)
+            self._tokens -= tokens
+            return wait
+
+    def refund(self, tokens=1):
+        """Return reserved tokens that were not used (the request was rejected elsewhere)"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+
+class ConcurrencyLimiter:
+    """Bounded number of concurrent holders plus a bounded FIFO-ish wait queue"""
+
+    def __init__(self, name, max_concurrent, max_queue):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self._active = 0
+        self._waiting = 0
+        self._avg_hold = 1.0
+        self._cond = threading.Condition()
+
+    def _retry_after(self):
+        # Expected time until enough slots free up for everyone already queued
+        return self._avg_hold * (self._waiting + 1) / self.max_concurrent
+
+    def acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self._active < self.max_concurrent and not self._waiting:
+                self._active += 1
+                return
+            if self._waiting >= self.max_queue:
+                LIMITER_REJECTED.inc(scope=self.name, reason="queue_full")
+                raise RateLimitExceeded(f"Too many queued requests for {self.name}", self._retry_after())
+            self._waiting += 1
+            try:
+                while self._active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        LIMITER_REJECTED.inc(scope=self.name, reason="timeout")
+                        raise RateLimitExceeded(f"Timed out waiting for {self.name}", self._retry_after())
+                    self._cond.wait(remaining)
+                self._active += 1
+            finally:
+                self._waiting -= 1
+
+    def release(self, held_for):
+        with self._cond:
+            self._active -= 1
+            self._avg_hold = 0.9 * self._avg_hold + 0.1 * held_for
+            self._cond.notify()
+
+
+class LLMAdmission:
+    """Global and per-agent admission control around LLM-backed requests"""
+
+    def __init__(self, max_concurrent=16, agent_max_concurrent=4, rate=0.0, agent_rate=0.0,
+                 max_queue=64, queue_timeout=10.0):
+        self.agent_max_concurrent = agent_max_concurrent
+        self.agent_rate = agent_rate
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._global = ConcurrencyLimiter("global", max_concurrent, max_queue)
+        self._global_bucket = TokenBucket(rate) if rate > 0 else None
+        self._agents = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_concurrent=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+            agent_max_concurrent=int(os.getenv("AGENT_MAX_CONCURRENCY", "4")),
+            rate=float(os.getenv("LLM_RATE_LIMIT", "0")),
+            agent_rate=float(os.getenv("AGENT_RATE_LIMIT", "0")),
+            max_queue=int(os.getenv("LLM_QUEUE_SIZE", "64")),
+            queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "10")),
+        )
+
+    def _agent_limits(self, key):
+        with self._lock:
+            limits = self._agents.get(key)
+            if limits is None:
+                bucket = TokenBucket(self.agent_rate) if self.agent_rate > 0 else None
+                limits = (ConcurrencyLimiter(f"agent:{key}", self.agent_max_concurrent, self.max_queue), bucket)
+                self._agents[key] = limits
+            return limits
+
+    @contextmanager
+    def slot(self, key):
+        """Hold one LLM slot for `key` (an agent name), waiting at most queue_timeout"""
+        start = time.monotonic()
+        limiter, bucket = self._agent_limits(key)
+
+        # Rate limits first: wait out short deficits, reject long ones. Tokens of a
+        # rejected request go back, so a busy global limit can't drain the agent budgets
+        wait = 0.0
+        reserved = []
+        try:
+            for b in (bucket, self._global_bucket):
+                if b is not None:
+                    try:
+                        wait = max(wait, b.reserve(max_wait=self.queue_timeout))
+                    except RateLimitExceeded:
+                        LIMITER_REJECTED.inc(scope="agent" if b is bucket else "global", reason="rate")
+                        raise
+                    reserved.append(b)
+            if wait:
+                time.sleep(wait)
+
+            # Agent slot before global slot so a hot agent cannot hoard global capacity while queued
+            limiter.acquire(self.queue_timeout - (time.monotonic() - start))
+            try:
+                self._global.acquire(self.queue_timeout - (time.monotonic() - start))
+            except RateLimitExceeded:
+                limiter.release(0.0)
+                raise
+        except RateLimitExceeded:
+            for b in reserved:
+                b.refund()
+            raise
+        admitted = time.monotonic()
+        LIMITER_WAIT.observe(admitted - start)
+        LIMITER_INFLIGHT.inc(scope="global")
+        try:
+            yield
+        finally:
+            held = time.monotonic() - admitted
+            LIMITER_INFLIGHT.dec(scope="global")
+            self._global.release(held)
+            limiter.release(held)
+
+
+def is_upstream_rate_limit(error):
+    """True for provider 429s (openai.RateLimitError or any error carrying status 429)"""
+    return type(error).__name__ == "RateLimitError" or getattr(error, "status_code", None) == 429
+
+
+def _upstream_retry_after(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_backoff(fn, max_retries=3, base_delay=0.5, max_delay=8.0):
+    """Call fn, retrying upstream 429s with full-jitter exponential backoff"""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if not is_upstream_rate_limit(e):
+                raise
+            hinted = _upstream_retry_after(e)
+            delay = min(max_delay, base_delay * 2 ** attempt)
+            if attempt == max_retries or (hinted and hinted > max_delay):
+                raise RateLimitExceeded("Upstream LLM provider is rate limiting requests",
+                                        retry_after=hinted or delay) from e
+            UPSTREAM_RETRIES.inc()
+            time.sleep(max(hinted or 0.0, random.uniform(0, delay)))
+
+
+# Process-wide admission controller shared by all agents
+LLM_ADMISSION = LLMAdmission.from_env()
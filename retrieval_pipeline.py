@@ -0,0 +1,134 @@
+"""
+Condense -> retrieve -> generate pipeline that starts retrieval on the raw
+question while the follow-up question is still being condensed.
+
+ConversationalRetrievalChain runs the three steps strictly in sequence. Here
+retrieval for the raw question is submitted immediately (it can even be
+prefetched before the rule-based check runs); once the condensed question is
+known it is compared with the raw one and the speculative results are reused
+when they are close enough, otherwise retrieval runs again on the condensed
+question. The pipeline is callable like the chain it replaces:
+pipeline({"question": ...}, callbacks=[...]) -> {"answer": ..., ...}.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from chunk_store import to_documents
+from metrics import record_cache, stage_timer
+from text_similarity import question_similarity
+
+# Set SPECULATIVE_RETRIEVAL=0 to fall back to ConversationalRetrievalChain
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "1") != "0"
+
+# Shared pool for speculative work, so requests don't pay for thread creation
+_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv("SPECULATIVE_WORKERS", "32")),
+                               thread_name_prefix="speculative")
+
+
+class SpeculativeRetrievalPipeline:
+    """Conversational RAG with retrieval overlapped with question condensing"""
+
+    def __init__(self, condense, retrieve, generate, memory=None, similarity_threshold=0.5, speculative=True):
+        # condense(question, chat_history, callbacks) -> standalone question
+        # retrieve(question, callbacks) -> documents
+        # generate(question, documents, chat_history, callbacks) -> answer
+        self.condense = condense
+        self.retrieve = retrieve
+        self.generate = generate
+        self.memory = memory
+        self.similarity_threshold = similarity_threshold
+        self.speculative = speculative
+
+    @classmethod
+    def from_langchain(cls, llm, retriever, prompt, memory, retrieve=None, **kwargs):
+        """Wire the pipeline to LangChain components, mirroring ConversationalRetrievalChain.from_llm
+
+        retrieve(question, callbacks) replaces the retriever, e.g. to return ChunkRecords;
+        they are converted to Documents only when the answer prompt is built.
+        """
+        from langchain.chains import LLMChain
+        from langchain.chains.conversational_retrieval.prompts import CONDENSE_QUESTION_PROMPT
+        from langchain.chains.question_answering import load_qa_chain
+        from langchain_core.messages import get_buffer_string
+
+        question_generator = LLMChain(llm=llm, prompt=CONDENSE_QUESTION_PROMPT)
+        combine_docs_chain = load_qa_chain(llm, chain_type="stuff", prompt=prompt)
+
+        def condense(question, chat_history, callbacks):
+            result = question_generator.invoke(
+                {"question": question, "chat_history": get_buffer_string(chat_history)}, config={"callbacks": callbacks}
+            )
+            return result[question_generator.output_key]
+
+        def retrieve_documents(question, callbacks):
+            return retriever.get_relevant_documents(question, callbacks=callbacks)
+
+        def generate(question, documents, chat_history, callbacks):
+            result = combine_docs_chain.invoke(
+                {"input_documents": to_documents(documents), "question": question}, config={"callbacks": callbacks}
+            )
+            return result[combine_docs_chain.output_key]
+
+        return cls(condense, retrieve or retrieve_documents, generate, memory=memory, **kwargs)
+
+    def prefetch(self, question, callbacks=None):
+        """Start retrieval for the raw question, e.g. while the rule-based check runs"""
+        if not self.speculative:
+            return None
+        return _EXECUTOR.submit(self.retrieve, question, callbacks)
+
+    def _speculative_result(self, pending, question, callbacks):
+        """(documents, reused) from a prefetch; a failed prefetch is retried in this thread
+
+        The same future is passed to every call_with_backoff attempt, so without this
+        a prefetch that failed once would make every retry fail the same way.
+        """
+        try:
+            return pending.result(), True
+        except Exception:
+            return self.retrieve(question, callbacks), False
+
+    def _chat_history(self):
+        if self.memory is None:
+            return []
+        return self.memory.load_memory_variables({}).get(self.memory.memory_key, [])
+
+    def __call__(self, inputs, callbacks=None):
+        question = inputs["question"]
+        chat_history = inputs.get("chat_history")
+        if chat_history is None:
+            chat_history = self._chat_history()
+        pending = inputs.get("prefetched") or self.prefetch(question, callbacks)
+
+        reused = None
+        if chat_history:
+            with stage_timer("condense"):
+                standalone = self.condense(question, chat_history, callbacks)
+            if pending is not None and question_similarity(question, standalone) >= self.similarity_threshold:
+                documents, reused = self._speculative_result(pending, standalone, callbacks)
+            else:
+                if pending is not None:
+                    pending.cancel()
+                    reused = False
+                documents = self.retrieve(standalone, callbacks)
+        else:
+            # No history: nothing to condense, the raw question is the final one
+            standalone = question
+            if pending is not None:
+                documents, _ = self._speculative_result(pending, question, callbacks)
+            else:
+                documents = self.retrieve(question, callbacks)
+        if reused is not None:
+            record_cache("speculative_retrieval", reused)
+
+        answer = self.generate(standalone, documents, chat_history, callbacks)
+        if self.memory is not None:
+            self.memory.save_context({"question": question}, {"answer": answer})
+        return {
+            "question": question,
+            "generated_question": standalone,
+            "answer": answer,
+            "source_documents": documents,
+            "speculative_hit": reused,
+        }
@@ -0,0 +1,21 @@
+"""
+LangChain retrievers used by the agents. Imported on first use, so importing
+multi_agent_chatbot does not load LangChain.
+"""
+
+from typing import Any
+
+from langchain_core.retrievers import BaseRetriever
+
+from dedup import collapse_duplicates
+
+
+class CollapsingRetriever(BaseRetriever):
+    """Similarity search that drops near-duplicate chunks so they don't fill the top-k slots"""
+    
+    vectorstore: Any
+    k: int = 3
+    fetch_k: int = 8
+    
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        return collapse_duplicates(self.vectorstore.similarity_search(query, k=self.fetch_k), self.k)
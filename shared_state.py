@@ -0,0 +1,279 @@
+"""
+Shared state backends so several uvicorn workers see the same agents,
+conversation memory, caches and re-index notifications.
+
+Backends are selected with a URL (STATE_BACKEND_URL):
+- memory://                 in-process dicts (single worker, the default)
+- sqlite:///path/state.db   local file shared by all workers on one machine
+- redis://host:6379/0       Redis, requires the optional `redis` package
+
+All backends expose the same small key/value, hash and list API and store
+JSON-serializable values.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_STATE_URL = "memory://"
+
+
+class StateBackend:
+    """Interface shared by all state backends"""
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def incr(self, key, amount=1):
+        raise NotImplementedError
+
+    def hset(self, key, field, value):
+        raise NotImplementedError
+
+    def hget(self, key, field, default=None):
+        raise NotImplementedError
+
+    def hgetall(self, key):
+        raise NotImplementedError
+
+    def hdel(self, key, field):
+        raise NotImplementedError
+
+    def rpush(self, key, *values):
+        raise NotImplementedError
+
+    def lrange(self, key, start=0, end=-1):
+        raise NotImplementedError
+
+
+class MemoryStateBackend(StateBackend):
+    """Process-local backend, also usable as a stand-in for Redis in tests"""
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+
+    def _alive(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if not self._alive(key):
+                return default
+            return json.loads(self._data[key])
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = json.dumps(value)
+            if ttl:
+                self._expires[key] = time.time() + ttl
+            else:
+                self._expires.pop(key, None)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            value = (self.get(key) or 0) + amount
+            self._data[key] = json.dumps(value)
+            return value
+
+    def hset(self, key, field, value):
+        with self._lock:
+            self._data.setdefault(key, {})[field] = json.dumps(value)
+
+    def hget(self, key, field, default=None):
+        with self._lock:
+            raw = self._data.get(key, {}).get(field)
+            return default if raw is None else json.loads(raw)
+
+    def hgetall(self, key):
+        with self._lock:
+            return {field: json.loads(raw) for field, raw in self._data.get(key, {}).items()}
+
+    def hdel(self, key, field):
+        with self._lock:
+            self._data.get(key, {}).pop(field, None)
+
+    def rpush(self, key, *values):
+        with self._lock:
+            items = self._data.setdefault(key, [])
+            items.extend(json.dumps(v) for v in values)
+            return len(items)
+
+    def lrange(self, key, start=0, end=-1):
+        with self._lock:
+            items = self._data.get(key, [])
+            stop = None if end == -1 else end + 1
+            return [json.loads(raw) for raw in items[start:stop]]
+
+
+class SQLiteStateBackend(StateBackend):
+    """File-backed backend shared by all worker processes on one machine"""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._local = threading.local()
+        # WAL lets readers in other workers proceed while one worker writes
+        self._conn().execute("PRAGMA journal_mode=WAL")
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS hashes (key TEXT, field TEXT, value TEXT, PRIMARY KEY (key, field))")
+            conn.execute("CREATE TABLE IF NOT EXISTS lists (id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT, value TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS lists_key ON lists (key, id)")
+
+    def _conn(self):
+        # One connection per thread; sqlite3 connections are not thread-safe
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _connect(self):
+        """Write transaction; reads use the autocommit connection directly"""
+        return _Transaction(self._conn())
+
+    def get(self, key, default=None):
+        row = self._conn().execute("SELECT value, expires FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return default
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+                         (key, json.dumps(value), expires))
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            conn.execute("DELETE FROM hashes WHERE key = ?", (key,))
+            conn.execute("DELETE FROM lists WHERE key = ?", (key,))
+
+    def incr(self, key, amount=1):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+            value = (json.loads(row[0]) if row else 0) + amount
+            conn.execute("INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, NULL)",
+                         (key, json.dumps(value)))
+        return value
+
+    def hset(self, key, field, value):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO hashes (key, field, value) VALUES (?, ?, ?)",
+                         (key, field, json.dumps(value)))
+
+    def hget(self, key, field, default=None):
+        row = self._conn().execute("SELECT value FROM hashes WHERE key = ? AND field = ?", (key, field)).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def hgetall(self, key):
+        rows = self._conn().execute("SELECT field, value FROM hashes WHERE key = ?", (key,)).fetchall()
+        return {field: json.loads(value) for field, value in rows}
+
+    def hdel(self, key, field):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM hashes WHERE key = ? AND field = ?", (key, field))
+
+    def rpush(self, key, *values):
+        with self._connect() as conn:
+            conn.executemany("INSERT INTO lists (key, value) VALUES (?, ?)",
+                             [(key, json.dumps(v)) for v in values])
+            return conn.execute("SELECT COUNT(*) FROM lists WHERE key = ?", (key,)).fetchone()[0]
+
+    def lrange(self, key, start=0, end=-1):
+        rows = self._conn().execute("SELECT value FROM lists WHERE key = ? ORDER BY id", (key,)).fetchall()
+        stop = None if end == -1 else end + 1
+        return [json.loads(row[0]) for row in rows[start:stop]]
+
+
+class _Transaction:
+    """Wrap a connection in BEGIN IMMEDIATE ... COMMIT so read-modify-write is atomic"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class RedisStateBackend(StateBackend):
+    """Redis-backed state for deployments spanning several machines"""
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RedisStateBackend requires the 'redis' package: pip install redis") from e
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key, default=None):
+        raw = self.client.get(key)
+        return default if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, json.dumps(value), ex=int(ttl) if ttl else None)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def incr(self, key, amount=1):
+        return self.client.incrby(key, amount)
+
+    def hset(self, key, field, value):
+        self.client.hset(key, field, json.dumps(value))
+
+    def hget(self, key, field, default=None):
+        raw = self.client.hget(key, field)
+        return default if raw is None else json.loads(raw)
+
+    def hgetall(self, key):
+        return {field.decode("utf-8"): json.loads(raw) for field, raw in self.client.hgetall(key).items()}
+
+    def hdel(self, key, field):
+        self.client.hdel(key, field)
+
+    def rpush(self, key, *values):
+        return self.client.rpush(key, *[json.dumps(v) for v in values])
+
+    def lrange(self, key, start=0, end=-1):
+        return [json.loads(raw) for raw in self.client.lrange(key, start, end)]
+
+
+def create_state_backend(url=None):
+    """Create a backend from a URL, defaulting to STATE_BACKEND_URL or memory://"""
+    url = url or os.getenv("STATE_BACKEND_URL", DEFAULT_STATE_URL)
+    if url.startswith("memory://"):
+        return MemoryStateBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteStateBackend(url[len("sqlite:///"):])
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        return RedisStateBackend(url)
+    raise ValueError(f"Unsupported state backend URL: {url}")
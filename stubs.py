@@ -0,0 +1,119 @@
+"""
+Deterministic stand-ins for ChatOpenAI and OpenAIEmbeddings.
+
+They let the agents run without an OpenAI key (benchmarks, CI, air-gapped
+machines) while keeping the same LangChain interfaces, including the
+token_usage reporting used by the metrics callback.
+"""
+
+import hashlib
+import math
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.retrievers import BaseRetriever
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _approx_tokens(text):
+    # Rough OpenAI tokenizer ratio, good enough for cost and throughput estimates
+    return max(1, len(text) // 4)
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model returning deterministic answers after a configurable delay"""
+
+    latency: float = 0.0
+    latency_per_token: float = 0.0
+    model_name: str = "stub-chat"
+    responses: Optional[List[str]] = None
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "stub-chat"
+
+    def _next_answer(self, messages):
+        if self.responses:
+            return self.responses[self.calls % len(self.responses)]
+        last = messages[-1].content if messages else ""
+        # Echo the question part so condensing keeps the question intact
+        question = last.rsplit("Question:", 1)[-1].rsplit("Follow Up Input:", 1)[-1]
+        question = question.replace("Standalone question:", "").strip()
+        digest = hashlib.sha1(last.encode("utf-8")).hexdigest()[:8]
+        return f"{question} [stub {digest}]"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        answer = self._next_answer(messages)
+        self.calls += 1
+        prompt_tokens = sum(_approx_tokens(m.content) for m in messages)
+        completion_tokens = _approx_tokens(answer)
+        delay = self.latency + self.latency_per_token * completion_tokens
+        if delay > 0:
+            time.sleep(delay)
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=answer))],
+            llm_output={
+                "token_usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+                "model_name": self.model_name,
+            },
+        )
+
+
+class HashingEmbeddings(Embeddings):
+    """Feature-hashing embeddings: similar texts share tokens and so share directions"""
+
+    def __init__(self, size=256, latency=0.0, latency_per_text=0.0):
+        self.size = size
+        self.latency = latency
+        self.latency_per_text = latency_per_text
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for token in _tokenize(text):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            sign = 1.0 if value & 1 else -1.0
+            vector[(value >> 1) % self.size] += sign
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm:
+            vector = [v / norm for v in vector]
+        return vector
+
+    def _sleep(self, count):
+        delay = self.latency + self.latency_per_text * count
+        if delay > 0:
+            time.sleep(delay)
+
+    def embed_documents(self, texts):
+        self._sleep(len(texts))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        self._sleep(1)
+        return self._embed(text)
+
+
+class FixedVectorRetriever(BaseRetriever):
+    """Retriever that ignores the query and searches with a fixed vector (no embedding API calls)"""
+
+    vectorstore: Any
+    vector: List[float]
+    k: int = 3
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        return self.vectorstore.similarity_search_by_vector(self.vector, k=self.k)
@@ -36,7 +36,25 @@ def main():
     test_files = [
         "test_multi_agent.py",
         "test_loading.py",
-        "debug_agents.py"
+        "debug_agents.py",
+        "test_metrics.py",
+        "test_benchmark_harness.py",
+        "test_shared_state.py",
+        "test_rate_limit.py",
+        "test_lifecycle.py",
+        "test_retrieval_pipeline.py",
+        "test_document_digest.py",
+        "test_extractive.py",
+        "test_dedup.py",
+        "test_page_cache.py",
+        "test_index_pack.py",
+        "test_document_watcher.py",
+        "test_chunk_store.py",
+        "test_startup.py",
+        "test_profiling.py",
+        "test_answer_mode.py",
+        "test_batch_answers.py",
+        "test_agent_registry.py"
     ]
     
     success_count = 0
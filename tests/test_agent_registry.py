@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script for concurrent changes to the agent registry
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+
+# Add parent directory to path to import multi_agent_chatbot
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared_state import MemoryStateBackend
+
+def test_agent_registry():
+    """Test that watcher-style registry changes don't break readers and ingests of one agent don't overlap"""
+
+    print("=== Agent Registry Test ===\n")
+
+    # Skipped when a dependency (e.g. python-dotenv) is not installed
+    pytest.importorskip("multi_agent_chatbot")
+    from multi_agent_chatbot import MultiAgentChatbot, PDFAgent
+
+    workdir = tempfile.mkdtemp()
+    documents_dir = os.path.join(workdir, "documents")
+    os.makedirs(documents_dir)
+
+    print("1. Readers survive agents being added and removed concurrently...")
+    chatbot = MultiAgentChatbot(documents_dir, os.path.join(workdir, "vector_stores"), state=MemoryStateBackend())
+    chatbot.create_agents()
+    stop = threading.Event()
+    errors = []
+
+    def churn():
+        i = 0
+        while not stop.is_set():
+            pdf_path = os.path.join(documents_dir, f"doc{i % 50}.pdf")
+            with chatbot._agents_lock:
+                chatbot.agents[f"doc{i % 50}"] = chatbot._new_agent(pdf_path, f"doc{i % 50}")
+            chatbot.handle_document_removed(os.path.join(documents_dir, f"doc{(i + 25) % 50}.pdf"))
+            i += 1
+
+    worker = threading.Thread(target=churn)
+    worker.start()
+    try:
+        deadline = time.time() + 1.0
+        while time.time() < deadline:
+            try:
+                chatbot.list_agents()
+                chatbot.get_response("which documents do you have?")
+            except RuntimeError as e:
+                errors.append(e)
+                break
+    finally:
+        stop.set()
+        worker.join()
+    assert not errors, errors
+
+    print("2. Ingests of the same agent run one at a time...")
+
+    class SlowAgent(PDFAgent):
+        running = 0
+        overlapped = False
+
+        def load_existing_vectorstore(self):
+            return False
+
+        def _ingest_document(self):
+            SlowAgent.running += 1
+            SlowAgent.overlapped |= SlowAgent.running > 1
+            time.sleep(0.05)
+            SlowAgent.running -= 1
+
+    agent = SlowAgent(os.path.join(documents_dir, "handbook.pdf"), vector_stores_dir=os.path.join(workdir, "vector_stores"), deduplicator=False)
+    threads = [threading.Thread(target=agent.process_document) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not SlowAgent.overlapped
+
+    print("3. A digest replaced by another worker's rebuild is not served stale...")
+    state = MemoryStateBackend()
+    vector_stores_dir = os.path.join(workdir, "shared_stores")
+    pdf_path = os.path.join(documents_dir, "handbook.pdf")
+    writer = PDFAgent(pdf_path, vector_stores_dir=vector_stores_dir, state=state, deduplicator=False)
+    os.makedirs(writer.get_vectorstore_path())
+    writer._update_manifest(digest={"summary": "Old summary", "outline": [], "faq": []})
+    reader = PDFAgent(pdf_path, vector_stores_dir=vector_stores_dir, state=state, deduplicator=False)
+    assert reader.answer_from_digest("What is this document about?") == "Old summary"
+    writer._update_manifest(digest={"summary": "New summary", "outline": [], "faq": []})
+    state.incr(f"index_version:{writer.agent_name}")
+    reader._check_index_version()
+    assert reader.answer_from_digest("What is this document about?") == "New summary"
+
+    print("4. A failed ingest releases its claim so the file version can be retried...")
+
+    class FlakyAgent(PDFAgent):
+        attempts = 0
+
+        def is_stale(self):
+            return True
+
+        def process_document(self):
+            FlakyAgent.attempts += 1
+            if FlakyAgent.attempts == 1:
+                raise RuntimeError("embedding service unavailable")
+
+    with open(pdf_path, "wb") as f:
+        f.write(b"%PDF-1.4")
+    chatbot = MultiAgentChatbot(documents_dir, vector_stores_dir, state=state)
+    chatbot.agents["handbook"] = FlakyAgent(pdf_path, vector_stores_dir=vector_stores_dir, state=state, deduplicator=False)
+    chatbot._register_agents()
+    try:
+        chatbot.handle_document_change(pdf_path)
+        assert False, "expected RuntimeError"
+    except RuntimeError:
+        pass
+    assert chatbot.handle_document_change(pdf_path) is True
+    assert FlakyAgent.attempts == 2
+
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    try:
+        test_agent_registry()
+    except pytest.skip.Exception as e:
+        print(f"   (skipped: {e.msg})")
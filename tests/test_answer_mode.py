@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script for per-agent answer modes
+"""
+
+import sys
+import os
+import tempfile
+
+import pytest
+
+# Add parent directory to path to import multi_agent_chatbot
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent_manifest import save_manifest
+from shared_state import MemoryStateBackend
+
+def test_answer_mode():
+    """Test that an agent's answer mode is validated, saved in its manifest and shared through the registry"""
+
+    print("=== Answer Mode Test ===\n")
+
+    # Skipped when a dependency (e.g. python-dotenv) is not installed
+    pytest.importorskip("multi_agent_chatbot")
+    from multi_agent_chatbot import MultiAgentChatbot, PDFAgent
+
+    workdir = tempfile.mkdtemp()
+    documents_dir = os.path.join(workdir, "documents")
+    vector_stores_dir = os.path.join(workdir, "vector_stores")
+    pdf_path = os.path.join(documents_dir, "handbook.pdf")
+
+    print("1. Invalid modes are rejected...")
+    agent = PDFAgent(pdf_path, vector_stores_dir=vector_stores_dir, deduplicator=False)
+    try:
+        agent.set_answer_mode("summarize")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+    print("2. The mode is kept in the agent's manifest...")
+    os.makedirs(agent.get_vectorstore_path())
+    save_manifest(agent.get_vectorstore_path(), {"pdf_path": pdf_path})
+    agent.set_answer_mode("extractive")
+    reloaded = PDFAgent(pdf_path, vector_stores_dir=vector_stores_dir, deduplicator=False)
+    assert reloaded.answer_mode == "extractive"
+    assert PDFAgent(pdf_path, vector_stores_dir=vector_stores_dir, answer_mode="generative", deduplicator=False).answer_mode == "generative"
+
+    print("3. Setting the mode on one worker reaches the others...")
+    state = MemoryStateBackend()
+    first = MultiAgentChatbot(documents_dir, os.path.join(workdir, "shared"), state=state)
+    second = MultiAgentChatbot(documents_dir, os.path.join(workdir, "shared"), state=state)
+    first.agents["handbook"] = first._new_agent(pdf_path, "handbook")
+    first._register_agents()
+    second.sync_agents()
+    assert second.agents["handbook"].answer_mode == "generative"
+    assert first.set_answer_mode("handbook", "extractive")["answer_mode"] == "extractive"
+    assert first.set_answer_mode("missing", "extractive") is None
+    second.sync_agents()
+    assert second.agents["handbook"].answer_mode == "extractive"
+
+    print("4. Re-registering keeps the mode...")
+    first._register_agents()
+    assert state.hget("agents", "handbook")["answer_mode"] == "extractive"
+    third = MultiAgentChatbot(documents_dir, os.path.join(workdir, "shared"), state=state)
+    assert third._new_agent(pdf_path, "handbook").answer_mode == "extractive"
+
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    try:
+        test_answer_mode()
+    except pytest.skip.Exception as e:
+        print(f"   (skipped: {e.msg})")
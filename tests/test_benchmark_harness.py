@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test script for the benchmark harness helpers (percentiles and baseline comparison)
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add benchmarks directory to path to import harness
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from harness import compare_to_baseline, latency_summary, percentile, report_comparison
+
+def test_benchmark_harness():
+    """Test percentile math and regression detection"""
+    
+    print("=== Benchmark Harness Test ===\n")
+    
+    print("1. Percentiles...")
+    samples = [0.001 * i for i in range(1, 101)]
+    assert abs(percentile(samples, 50) - 0.0505) < 1e-9
+    assert abs(percentile(samples, 100) - 0.1) < 1e-9
+    assert percentile([], 95) == 0.0
+    summary = latency_summary(samples)
+    assert summary["count"] == 100 and abs(summary["p95_ms"] - 95.05) < 1e-6
+    
+    print("2. Baseline comparison...")
+    baseline = {"metrics": {"query_latency": {"p95_ms": 100.0}, "ingestion": {"pages_per_s": 50.0}}}
+    within = {"metrics": {"query_latency": {"p95_ms": 110.0}, "ingestion": {"pages_per_s": 45.0}}}
+    assert compare_to_baseline(within, baseline, tolerance=0.2) == []
+    
+    worse = {"metrics": {"query_latency": {"p95_ms": 150.0}, "ingestion": {"pages_per_s": 30.0}}}
+    regressions = {r["metric"] for r in compare_to_baseline(worse, baseline, tolerance=0.2)}
+    print(f"   Regressions: {sorted(regressions)}")
+    assert regressions == {"query_latency.p95_ms", "ingestion.pages_per_s"}
+    
+    print("3. A missing baseline fails the check...")
+    baseline_path = os.path.join(tempfile.mkdtemp(), "baseline.json")
+    assert not report_comparison(within, baseline_path, 0.2)
+    with open(baseline_path, "w") as f:
+        json.dump(baseline, f)
+    assert report_comparison(within, baseline_path, 0.2)
+    assert not report_comparison(worse, baseline_path, 0.2)
+    
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    test_benchmark_harness()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script for compact retrieval chunk records
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import chunk_store
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunk_store import ChunkRecord, PageBuffer, intern_keys, to_documents
+from dedup import collapse_duplicates, simhash
+from extractive import extract_answer
+
+PAGES = [
+    "Internship rules. Students must complete 300 hours of internship.",
+    "Deadlines. The final report is due in week 14 of the semester.",
+]
+
+def hit(page, sentence, **extra):
+    start = PAGES[page].index(sentence)
+    metadata = {"source": "documents/handbook.pdf", "page": page, "start_index": start, "length": len(sentence)}
+    metadata.update(extra)
+    return metadata
+
+def test_chunk_store():
+    """Test page buffer spans, shared keys, fallbacks and conversion"""
+
+    print("=== Chunk Store Test ===\n")
+
+    print("1. Records point into the page buffer...")
+    buffer = PageBuffer(PAGES)
+    assert buffer.text == "".join(PAGES) and len(buffer) == len(buffer.text)
+    sentence = "The final report is due in week 14 of the semester."
+    record = ChunkRecord.from_metadata(hit(1, sentence), buffer)
+    assert record.own_text is None and record.page_content == sentence
+    assert record.get("page") == 1 and record.get("missing", "x") == "x"
+    assert record.metadata == hit(1, sentence)
+    assert not hasattr(record, "__dict__")
+
+    print("2. Metadata keys are shared between records...")
+    other = ChunkRecord.from_metadata(hit(0, "Internship rules."), buffer)
+    assert other.keys is record.keys
+    assert intern_keys(["page", "source"]) is intern_keys(("page", "source"))
+
+    print("3. Hits without offsets keep their own text...")
+    plain = ChunkRecord.from_metadata({"source": "old.pdf", "page": 0}, buffer, text="Legacy chunk text.")
+    assert plain.page_content == "Legacy chunk text."
+    assert ChunkRecord.from_metadata(None, None, "x").metadata == {}
+    out_of_range = ChunkRecord.from_metadata(dict(hit(0, "Internship rules."), page=7), buffer, text="stored")
+    assert out_of_range.page_content == "stored"
+
+    print("4. Fingerprints, collapse and extractive answers work on records...")
+    fingerprint = f"{simhash(sentence):016x}"
+    first = ChunkRecord.from_metadata(hit(1, sentence, simhash=fingerprint), buffer)
+    second = ChunkRecord.from_metadata(hit(1, sentence, simhash=fingerprint), buffer)
+    assert first.fingerprint == simhash(sentence)
+    assert collapse_duplicates([first, second, other], 3) == [first, other]
+    result = extract_answer("When is the final report due?", [(first, 0.9)], min_relevance=0.5, min_coverage=0.5)
+    assert result and result["citation"] == "handbook.pdf, page 2"
+
+    print("5. Documents pass through conversion unchanged...")
+    marker = object()
+    assert to_documents([marker]) == [marker]
+    try:
+        import langchain_core  # noqa: F401
+    except ImportError:
+        print("   (langchain_core not installed, skipping Document conversion)")
+    else:
+        document = to_documents([record])[0]
+        assert document.page_content == sentence and document.metadata == hit(1, sentence)
+
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    test_chunk_store()
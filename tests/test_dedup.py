@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script for near-duplicate chunk detection
+"""
+
+import sys
+import os
+import random
+import shutil
+import tempfile
+from types import SimpleNamespace
+
+# Add parent directory to path to import dedup
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent_manifest import save_manifest
+from dedup import CorpusDeduplicator, SimHashIndex, collapse_duplicates, hamming_distance, merge_reports, simhash
+
+WORDS = ["intern", "report", "student", "company", "hours", "deadline", "advisor", "credit", "week", "form"]
+
+def paragraph(seed):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(150))
+
+def chunk(text):
+    """Minimal stand-in for a LangChain Document"""
+    return SimpleNamespace(page_content=text, metadata={})
+
+def test_dedup():
+    """Test fingerprints, the banded index, ingest planning and retrieval collapsing"""
+    
+    print("=== Near-Duplicate Detection Test ===\n")
+    
+    print("1. Near-copies get close fingerprints...")
+    original = paragraph(1)
+    revised = original.replace("advisor", "adviser", 1) + " (rev. 2)"
+    assert hamming_distance(simhash(original), simhash(revised)) <= 3
+    assert hamming_distance(simhash(original), simhash(paragraph(2))) > 3
+    
+    print("2. Banded index finds fingerprints within the distance...")
+    index = SimHashIndex(max_distance=3)
+    index.add(0b1011 << 40, "a")
+    assert index.find((0b1011 << 40) ^ 0b111) == "a"
+    assert index.find((0b1011 << 40) ^ 0b1111) is None
+    assert len(index) == 1
+    
+    print("3. Ingest plan skips, links and embeds...")
+    vector_stores_dir = tempfile.mkdtemp()
+    try:
+        existing = os.path.join(vector_stores_dir, "chroma_db_handbook_v1")
+        os.makedirs(existing)
+        save_manifest(existing, {"fingerprints": {"chunk-000000": f"{simhash(paragraph(3)):016x}"}})
+        
+        deduplicator = CorpusDeduplicator(vector_stores_dir)
+        target = os.path.join(vector_stores_dir, "chroma_db_handbook_v2")
+        chunks = [chunk(original), chunk(revised), chunk(paragraph(3)), chunk(paragraph(4))]
+        new, linked, skipped = deduplicator.plan(target, chunks)
+        assert [i for i, _ in new] == ["chunk-000000", "chunk-000003"]
+        assert linked[0][0] == "chunk-000002" and linked[0][2] == (existing, "chunk-000000")
+        assert skipped == [chunks[1]]
+        assert all("simhash" in c.metadata for c in chunks)
+        
+        deduplicator.register(target, {i: c.metadata["simhash"] for i, c in new})
+        assert deduplicator.plan(target, [chunk(paragraph(4))])[0], "own chunks are never linked"
+        other = os.path.join(vector_stores_dir, "chroma_db_copy")
+        assert deduplicator.plan(other, [chunk(paragraph(4))])[1][0][2] == (target, "chunk-000003")
+    finally:
+        shutil.rmtree(vector_stores_dir)
+    
+    print("4. Retrieval drops near-duplicates and keeps rank order...")
+    results = [chunk(original), chunk(revised), chunk(paragraph(5)), chunk(paragraph(6))]
+    assert collapse_duplicates(results, 2) == [results[0], results[2]]
+    scored = [(doc, 0.9 - i / 10) for i, doc in enumerate(results)]
+    assert collapse_duplicates(scored, 3, document=lambda pair: pair[0]) == [scored[0], scored[2], scored[3]]
+    
+    print("5. Run report combines agents...")
+    report = merge_reports([
+        {"chunks": 10, "linked": 2, "skipped": 1},
+        {"chunks": 10, "linked": 0, "skipped": 1},
+    ])
+    assert report == {"chunks": 20, "embedded": 16, "linked": 2, "skipped": 2, "ratio": 0.2}
+    
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    test_dedup()
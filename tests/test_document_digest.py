@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for precomputed document digests and question matching
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import document_digest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_digest import match_digest, parse_digest, sample_excerpts
+
+DIGEST = {
+    "summary": "Internship handbook for third-year students.",
+    "outline": ["Eligibility", "Company selection", "Final report"],
+    "faq": [
+        {"question": "When is the internship report due?", "answer": "Within two weeks after the internship."},
+        {"question": "How many credits is the year 3 project?", "answer": "6 credits"},
+    ],
+}
+
+def test_document_digest():
+    """Test digest parsing and which questions are served from it"""
+    
+    print("=== Document Digest Test ===\n")
+    
+    print("1. Parsing LLM replies...")
+    reply = 'Here you go:\n```json\n{"summary": "S", "outline": ["A"], "faq": [{"question": "Q?", "answer": "A"}, {"question": ""}]}\n```'
+    assert parse_digest(reply) == {"summary": "S", "outline": ["A"], "faq": [{"question": "Q?", "answer": "A"}]}
+    try:
+        parse_digest("no json here")
+        raise AssertionError("Expected ValueError")
+    except ValueError:
+        pass
+    
+    print("2. Hot questions are answered from the digest...")
+    assert match_digest("What is this document about?", DIGEST) == DIGEST["summary"]
+    assert match_digest("เอกสารนี้เกี่ยวกับอะไร", DIGEST) == DIGEST["summary"]
+    assert match_digest("Show the table of contents", DIGEST).startswith("1. Eligibility")
+    assert match_digest("when is the internship report due", DIGEST) == DIGEST["faq"][0]["answer"]
+    
+    print("3. Other questions still go through retrieval...")
+    assert match_digest("Give me a summary of the company selection rules", DIGEST) is None
+    assert match_digest("Who approves the company?", DIGEST) is None
+    assert match_digest("What is this document about?", None) is None
+    
+    print("4. Near-miss FAQ questions are not answered from the digest...")
+    assert match_digest("How many credits is the year 3 project?", DIGEST) == "6 credits"
+    assert match_digest("how many credits is the year 3 project", DIGEST) == "6 credits"
+    assert match_digest("How many credits is the year 4 project?", DIGEST) is None
+    assert match_digest("How many credits is the year 3 thesis?", DIGEST) is None
+    assert match_digest("When is the internship proposal due?", DIGEST) is None
+    assert match_digest("When is the final internship report due?", DIGEST) is None
+    assert match_digest("What is this document about grading?", DIGEST) is None
+    assert match_digest("What topics does this document cover in week 5?", DIGEST) is None
+    assert match_digest("Summarize this document", DIGEST) == DIGEST["summary"]
+    
+    print("5. Excerpts stay within budget for long documents...")
+    excerpts = sample_excerpts(["x" * 3000] * 100, max_chars=12000)
+    assert excerpts.count("[page") == 24 and len(excerpts) < 13000
+    
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    test_document_digest()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the documents directory watcher
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Add parent directory to path to import document_watcher
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_watcher import DocumentWatcher, InotifySource
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def check_backend(backend):
+    directory = tempfile.mkdtemp()
+    changed, deleted = [], []
+    lock = threading.Lock()
+    
+    def on_change(path):
+        with lock:
+            changed.append(os.path.basename(path))
+    
+    def on_delete(path):
+        with lock:
+            deleted.append(os.path.basename(path))
+    
+    watcher = DocumentWatcher(directory, on_change, on_delete, debounce=0.3, poll_interval=0.05, backend=backend).start()
+    try:
+        path = os.path.join(directory, "handbook.pdf")
+        # Several writes in quick succession are one change
+        for i in range(3):
+            with open(path, "wb") as f:
+                f.write(b"%PDF-1.4 " + bytes([i]) * (i + 1))
+            time.sleep(0.05)
+        with open(os.path.join(directory, "notes.txt"), "w") as f:
+            f.write("ignored")
+        assert wait_for(lambda: changed == ["handbook.pdf"]), changed
+        time.sleep(0.5)
+        assert changed == ["handbook.pdf"], changed
+        
+        os.remove(path)
+        assert wait_for(lambda: deleted == ["handbook.pdf"]), deleted
+    finally:
+        watcher.stop()
+        shutil.rmtree(directory)
+    assert not watcher.running
+
+def test_document_watcher():
+    """Test debouncing, filtering and deletions with both backends"""
+    
+    print("=== Document Watcher Test ===\n")
+    
+    print("1. Polling backend...")
+    check_backend("poll")
+    
+    print("2. inotify backend...")
+    try:
+        InotifySource(tempfile.gettempdir()).close()
+    except OSError as e:
+        print(f"   skipped: {e}")
+    else:
+        check_backend("inotify")
+    
+    print("3. A failing handler is retried...")
+    directory = tempfile.mkdtemp()
+    calls = []
+    
+    def flaky(path):
+        calls.append(path)
+        if len(calls) < 3:
+            raise RuntimeError("embedding service unavailable")
+    
+    watcher = DocumentWatcher(directory, flaky, lambda path: None, debounce=0.1, poll_interval=0.05,
+                              backend="poll", retry_delay=0.05).start()
+    try:
+        with open(os.path.join(directory, "handbook.pdf"), "wb") as f:
+            f.write(b"%PDF-1.4")
+        assert wait_for(lambda: len(calls) == 3), calls
+        time.sleep(0.3)
+        assert len(calls) == 3, calls
+    finally:
+        watcher.stop()
+        shutil.rmtree(directory)
+    
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    test_document_watcher()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test script for extractive (no-LLM) answers with page citations
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+
+# Add parent directory to path to import extractive
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractive import coverage, extract_answer, split_sentences
+
+def chunk(text, page):
+    """Minimal stand-in for a LangChain Document"""
+    return SimpleNamespace(page_content=text, metadata={"source": "documents/handbook.pdf", "page": page})
+
+CHUNKS = [
+    (chunk("Students must complete 240 hours. The internship report is due within two weeks after the internship.", 4), 0.82),
+    (chunk("Companies are approved by the program committee.\nForms are available online.", 2), 0.78),
+]
+
+def test_extractive():
+    """Test sentence selection, citations and the confidence thresholds"""
+    
+    print("=== Extractive Answer Test ===\n")
+    
+    print("1. Splitting sentences and line-separated text...")
+    assert split_sentences("One. Two? Three!\nสี่ ห้า") == ["One.", "Two?", "Three!", "สี่ ห้า"]
+    assert coverage("When is the report due?", "The report is due in May.") == 1.0
+    
+    print("2. The best sentence is returned with its page...")
+    result = extract_answer("When is the internship report due?", CHUNKS)
+    assert result["sentence"].startswith("The internship report is due")
+    assert result["citation"] == "handbook.pdf, page 5"
+    assert result["answer"].endswith("(Source: handbook.pdf, page 5)")
+    result = extract_answer("Who approves companies?", CHUNKS)
+    assert result["citation"] == "handbook.pdf, page 3"
+    
+    print("3. Low confidence falls back to generation...")
+    assert extract_answer("When is the internship report due?", [(d, 0.4) for d, _ in CHUNKS]) is None
+    assert extract_answer("Explain the grading philosophy", CHUNKS) is None
+    assert extract_answer("anything", []) is None
+    
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    test_extractive()
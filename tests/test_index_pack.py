@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script for packed index files
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+
+# Add parent directory to path to import index_pack
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from index_pack import PackError, PackedIndex, write_pack
+
+def test_index_pack():
+    """Test writing, memory-mapped reading and integrity checks of packs"""
+    
+    print("=== Packed Index Test ===\n")
+    
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "handbook.chatpack")
+        
+        print("1. Writing a pack...")
+        header = write_pack(
+            path,
+            "handbook",
+            ["chunk-000000", "chunk-000001"],
+            [[0.5, -0.25, 1.0], [0.0, 2.0, -1.5]],
+            ["หน้าแรก\nfirst page", "second page"],
+            [{"source": "documents/handbook.pdf", "page": 0}, None],
+            manifest={"pdf_path": "documents/handbook.pdf", "num_chunks": 2}
+        )
+        assert header["count"] == 2 and header["dimension"] == 3
+        
+        print("2. Reading it back through the memory map...")
+        with PackedIndex(path) as pack:
+            assert pack.agent_name == "handbook" and len(pack) == 2
+            assert pack.manifest["num_chunks"] == 2
+            flat = pack.embeddings()
+            assert len(flat) == 6
+            assert pack.vector(1, flat) == [0.0, 2.0, -1.5]
+            chunks = list(pack.chunks())
+            assert chunks[0] == ("chunk-000000", "หน้าแรก\nfirst page", {"source": "documents/handbook.pdf", "page": 0})
+            assert chunks[1][2] == {}
+        
+        print("3. Corruption and truncation are detected...")
+        with open(path, "rb") as f:
+            data = bytearray(f.read())
+        corrupt = os.path.join(workdir, "corrupt.chatpack")
+        data[-2] ^= 0xFF
+        with open(corrupt, "wb") as f:
+            f.write(data)
+        for bad in (corrupt, __file__):
+            try:
+                PackedIndex(bad)
+                raise AssertionError(f"Expected PackError for {bad}")
+            except PackError:
+                pass
+        with open(corrupt, "wb") as f:
+            f.write(bytes(data[:len(data) // 2]))
+        try:
+            PackedIndex(corrupt)
+            raise AssertionError("Expected PackError for a truncated pack")
+        except PackError:
+            pass
+        
+        print("4. Mixed dimensions are rejected...")
+        try:
+            write_pack(os.path.join(workdir, "bad.chatpack"), "x", ["a", "b"], [[1.0], [1.0, 2.0]], ["a", "b"], [None, None])
+            raise AssertionError("Expected PackError")
+        except PackError:
+            pass
+    finally:
+        shutil.rmtree(workdir)
+    
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    test_index_pack()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test script for the background warm-up readiness tracker
+"""
+
+import sys
+import os
+import threading
+
+# Add parent directory to path to import lifecycle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lifecycle import Readiness
+
+def test_readiness():
+    """Test that readiness flips only after warm-up completes, even on failure"""
+    
+    print("=== Readiness Test ===\n")
+    
+    print("1. Not ready while warm-up runs...")
+    gate = threading.Event()
+    readiness = Readiness()
+    readiness.start(lambda: gate.wait() and {"agents": ["handbook"]})
+    assert readiness.status()["ready"] is False
+    
+    print("2. Ready with details once it finishes...")
+    gate.set()
+    assert readiness.wait(5)
+    status = readiness.status()
+    assert status["details"] == {"agents": ["handbook"]} and "error" not in status
+    
+    print("3. A failing warm-up still becomes ready and reports the error...")
+    def fail():
+        raise RuntimeError("vector store corrupted")
+    readiness = Readiness()
+    readiness.start(fail)
+    assert readiness.wait(5)
+    assert readiness.status()["error"] == "vector store corrupted"
+    
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    test_readiness()
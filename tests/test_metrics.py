@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script for the Prometheus-style metrics registry
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import metrics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import MetricsRegistry, MODEL_PRICING
+
+def test_metrics_registry():
+    """Test counters, histograms and the text exposition format"""
+    
+    print("=== Metrics Registry Test ===\n")
+    
+    registry = MetricsRegistry()
+    responses = registry.counter("test_responses_total", "Responses", ("source",))
+    latency = registry.histogram("test_stage_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+    
+    # Step 1: Counters accumulate per label set
+    print("1. Counting responses...")
+    responses.inc(source="rule")
+    responses.inc(2, source="rag")
+    assert responses.get(source="rule") == 1
+    assert responses.get(source="rag") == 2
+    
+    # Step 2: Histograms fill cumulative buckets
+    print("2. Observing latencies...")
+    latency.observe(0.05, stage="retrieval")
+    latency.observe(0.5, stage="retrieval")
+    latency.observe(5.0, stage="retrieval")
+    count, total = latency.get(stage="retrieval")
+    assert count == 3 and abs(total - 5.55) < 1e-9
+    
+    # Step 3: Rendered output follows the Prometheus text format
+    print("3. Rendering exposition format...")
+    output = registry.render()
+    print(output)
+    assert '# TYPE test_responses_total counter' in output
+    assert 'test_responses_total{source="rag"} 2' in output
+    assert 'test_stage_seconds_bucket{stage="retrieval",le="0.1"} 1' in output
+    assert 'test_stage_seconds_bucket{stage="retrieval",le="1"} 2' in output
+    assert 'test_stage_seconds_bucket{stage="retrieval",le="+Inf"} 3' in output
+    assert 'test_stage_seconds_count{stage="retrieval"} 3' in output
+    
+    # Step 4: Re-registering returns the same metric, wrong labels are rejected
+    print("4. Checking registration rules...")
+    assert registry.counter("test_responses_total", "Responses", ("source",)) is responses
+    try:
+        responses.inc(agent="x")
+        raise AssertionError("Expected ValueError for unknown label")
+    except ValueError:
+        pass
+    
+    assert "gpt-4o-mini" in MODEL_PRICING
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    test_metrics_registry()
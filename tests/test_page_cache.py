@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for the parsed-page cache
+"""
+
+import sys
+import os
+import gzip
+import shutil
+import tempfile
+
+# Add parent directory to path to import page_cache
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from page_cache import PageCache
+
+def test_page_cache():
+    """Test that each file version is parsed once and read back from the cache"""
+    
+    print("=== Page Cache Test ===\n")
+    
+    workdir = tempfile.mkdtemp()
+    parsed = []
+    
+    def parse(path):
+        parsed.append(path)
+        return [("หน้าแรก first page", {"source": path, "page": 0}), ("second page", {"source": path, "page": 1})]
+    
+    try:
+        pdf_path = os.path.join(workdir, "handbook.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 version one")
+        cache = PageCache(os.path.join(workdir, "cache"))
+        
+        print("1. First load parses and stores the pages...")
+        pages = cache.load(pdf_path, parse)
+        assert len(parsed) == 1 and pages[0][0] == "หน้าแรก first page"
+        
+        print("2. Later loads stream from the cache...")
+        assert cache.load(pdf_path, parse) == pages
+        assert len(parsed) == 1
+        assert list(cache.get(pdf_path)) == pages
+        
+        print("3. A renamed copy is a hit with its new source path...")
+        copy_path = os.path.join(workdir, "handbook copy.pdf")
+        shutil.copy(pdf_path, copy_path)
+        copied = cache.load(copy_path, parse)
+        assert len(parsed) == 1 and copied[1] == ("second page", {"source": copy_path, "page": 1})
+        
+        print("4. A changed file is parsed again...")
+        with open(pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 version two")
+        assert cache.get(pdf_path) is None
+        cache.load(pdf_path, parse)
+        assert len(parsed) == 2
+        
+        print("5. A corrupt entry falls back to parsing...")
+        with gzip.open(cache.entry_path(pdf_path), "wt") as f:
+            f.write("not json\n")
+        assert cache.load(pdf_path, parse)[0][0] == "หน้าแรก first page"
+        assert len(parsed) == 3
+        cache.load(pdf_path, parse)
+        assert len(parsed) == 3, "the entry was rewritten"
+        
+        print("6. Entries of old versions and deleted files are removed...")
+        os.remove(copy_path)
+        other_path = os.path.join(workdir, "rules.pdf")
+        with open(other_path, "wb") as f:
+            f.write(b"%PDF-1.4 rules")
+        cache.load(other_path, parse)
+        assert sorted(os.listdir(cache.cache_dir)) == sorted(
+            os.path.basename(cache.entry_path(p)) for p in (pdf_path, other_path)
+        )
+        os.remove(other_path)
+        assert cache.prune() == 1
+        assert os.listdir(cache.cache_dir) == [os.path.basename(cache.entry_path(pdf_path))]
+    finally:
+        shutil.rmtree(workdir)
+    
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    test_page_cache()
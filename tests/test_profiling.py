@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for on-demand request profiling
+"""
+
+import sys
+import os
+import pstats
+import shutil
+import tempfile
+import time
+
+# Add parent directory to path to import profiling
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import profiling
+from profiling import RequestProfiler, collapsed_stacks
+
+def square_sum(n):
+    return sum(i * i for i in range(n))
+
+def handle(n):
+    return square_sum(n) + square_sum(n // 2)
+
+def test_profiling():
+    """Test sessions, sampling limits, reports and the admin token check"""
+    
+    print("=== Request Profiling Test ===\n")
+    
+    print("1. Disabled profiler leaves endpoints untouched...")
+    assert RequestProfiler(enabled=False).profiled(handle) is handle
+    
+    print("2. Nothing is recorded until a session starts...")
+    profiler = RequestProfiler(enabled=True)
+    endpoint = profiler.profiled(handle)
+    assert endpoint.__wrapped__ is handle
+    assert endpoint(1000) == handle(1000)
+    assert profiler.status()["profiled_requests"] == 0 and profiler.report() == ""
+    
+    print("3. Session stops after max_requests...")
+    profiler.start(max_requests=2)
+    for _ in range(4):
+        endpoint(20000)
+    status = profiler.status()
+    assert not status["active"] and status["profiled_requests"] == 2
+    assert "square_sum" in profiler.report(limit=5)
+    
+    print("4. Window expires and a new session resets the report...")
+    profiler.start(duration=0.05)
+    endpoint(1000)
+    time.sleep(0.06)
+    endpoint(1000)
+    assert not profiler.active and profiler.status()["profiled_requests"] == 1
+    profiler.start(sample_rate=0.5)
+    for _ in range(200):
+        endpoint(10)
+    assert 50 < profiler.status()["profiled_requests"] < 150
+    profiler.stop()
+    endpoint(10)
+    assert profiler.status()["profiled_requests"] < 150
+    
+    print("5. Reports as pstats dump and collapsed stacks...")
+    profiler.start()
+    endpoint(20000)
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "profile.pstats")
+        with open(path, "wb") as f:
+            f.write(profiler.report("pstats"))
+        assert any(name == "square_sum" for _, _, name in pstats.Stats(path).stats)
+    finally:
+        shutil.rmtree(workdir)
+    lines = collapsed_stacks(profiler._stats)
+    stack = next(line for line in lines if "square_sum" in line)
+    frames, count = stack.rsplit(" ", 1)
+    assert int(count) > 0 and frames.index("handle") < frames.index("square_sum")
+    assert profiler.report("collapsed").splitlines() == lines
+    for fmt, sort in (("svg", "cumulative"), ("text", "nonsense")):
+        try:
+            profiler.report(fmt, sort)
+            assert False, f"{fmt}/{sort} should be rejected"
+        except ValueError:
+            pass
+    
+    print("6. Admin token check...")
+    original = profiling.ADMIN_TOKEN
+    try:
+        profiling.ADMIN_TOKEN = None
+        assert not profiling.is_admin("anything")
+        profiling.ADMIN_TOKEN = "s3cret"
+        assert profiling.is_admin("s3cret")
+        assert not profiling.is_admin("wrong") and not profiling.is_admin(None)
+    finally:
+        profiling.ADMIN_TOKEN = original
+    
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    test_profiling()
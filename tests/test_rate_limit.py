@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for LLM admission control (rate limits, bounded concurrency, backoff)
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path to import rate_limit
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limit import LLMAdmission, RateLimitExceeded, TokenBucket, call_with_backoff
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+def test_rate_limit():
+    """Test token bucket, queue bounds and upstream 429 retries"""
+    
+    print("=== Rate Limit Test ===\n")
+    
+    # Step 1: Token bucket admits a burst, then asks callers to wait
+    print("1. Token bucket...")
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0.0 and bucket.reserve() == 0.0
+    wait = bucket.reserve(max_wait=1.0)
+    assert 0 < wait <= 0.1
+    try:
+        bucket.reserve(max_wait=0.0)
+        raise AssertionError("Expected RateLimitExceeded")
+    except RateLimitExceeded as e:
+        assert e.retry_after >= 1.0
+    
+    # Step 2: One slot per agent, one queued waiter, second waiter rejected
+    print("2. Bounded concurrency and queue...")
+    admission = LLMAdmission(max_concurrent=4, agent_max_concurrent=1, max_queue=1, queue_timeout=2.0)
+    holding = threading.Event()
+    release = threading.Event()
+    
+    def hold():
+        with admission.slot("handbook"):
+            holding.set()
+            release.wait()
+    
+    holder = threading.Thread(target=hold)
+    holder.start()
+    holding.wait()
+    
+    def wait_in_queue():
+        with admission.slot("handbook"):
+            pass
+    
+    queued = threading.Thread(target=wait_in_queue)
+    queued.start()
+    time.sleep(0.1)
+    try:
+        with admission.slot("handbook"):
+            raise AssertionError("Expected the queue to be full")
+    except RateLimitExceeded:
+        pass
+    # Other agents still get their own slot
+    with admission.slot("syllabus"):
+        pass
+    release.set()
+    holder.join()
+    queued.join()
+    
+    # Step 3: Waiting longer than the queue timeout is rejected
+    print("3. Queue timeout...")
+    admission = LLMAdmission(max_concurrent=1, agent_max_concurrent=1, max_queue=4, queue_timeout=0.1)
+    with admission.slot("handbook"):
+        start = time.monotonic()
+        try:
+            with admission.slot("syllabus"):
+                raise AssertionError("Expected a timeout")
+        except RateLimitExceeded:
+            assert time.monotonic() - start >= 0.1
+    
+    # Step 4: Upstream 429s are retried, then surfaced as RateLimitExceeded
+    print("4. Upstream backoff...")
+    calls = []
+    
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise FakeRateLimitError("429")
+        return "ok"
+    
+    assert call_with_backoff(flaky, max_retries=3, base_delay=0.01) == "ok"
+    assert len(calls) == 3
+    try:
+        call_with_backoff(lambda: (_ for _ in ()).throw(FakeRateLimitError("429")), max_retries=1, base_delay=0.01)
+        raise AssertionError("Expected RateLimitExceeded")
+    except RateLimitExceeded:
+        pass
+    
+    # Step 5: A request the global bucket rejects gives its agent tokens back
+    print("5. Rejected requests keep the agent budget...")
+    admission = LLMAdmission(rate=1, agent_rate=1, queue_timeout=0.0)
+    admission._global_bucket.reserve()
+    for _ in range(3):
+        try:
+            with admission.slot("handbook"):
+                raise AssertionError("Expected RateLimitExceeded")
+        except RateLimitExceeded:
+            pass
+    _, agent_bucket = admission._agent_limits("handbook")
+    assert agent_bucket.reserve() == 0.0
+    
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    test_rate_limit()
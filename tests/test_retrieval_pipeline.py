@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script for the speculative retrieval pipeline
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import retrieval_pipeline
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval_pipeline import SpeculativeRetrievalPipeline, question_similarity
+
+def make_pipeline(rewrite):
+    retrieved = []
+    pipeline = SpeculativeRetrievalPipeline(
+        condense=lambda question, history, callbacks: rewrite,
+        retrieve=lambda question, callbacks: retrieved.append(question) or [f"doc:{question}"],
+        generate=lambda question, documents, history, callbacks: f"{question} -> {documents[0]}",
+    )
+    return pipeline, retrieved
+
+def test_retrieval_pipeline():
+    """Test reuse of speculative results, re-retrieval and the no-history path"""
+    
+    print("=== Speculative Retrieval Pipeline Test ===\n")
+    
+    print("1. Similarity...")
+    assert question_similarity("What is the deadline?", "What is the deadline?") == 1.0
+    assert question_similarity("What is the internship deadline?", "What's the internship deadline?") > 0.5
+    assert question_similarity("What about it?", "Who approves the internship company?") < 0.5
+    
+    print("2. Condensed question close to the raw one reuses speculative results...")
+    pipeline, retrieved = make_pipeline("What are the requirements for the internship?")
+    result = pipeline({"question": "What are the internship requirements?", "chat_history": ["turn"]})
+    assert result["speculative_hit"] is True
+    assert retrieved == ["What are the internship requirements?"]
+    assert result["answer"].endswith("doc:What are the internship requirements?")
+    
+    print("3. Rewritten follow-up retrieves again with the condensed question...")
+    pipeline, retrieved = make_pipeline("What is the deadline for the internship report?")
+    result = pipeline({"question": "And its deadline?", "chat_history": ["turn"]})
+    assert result["speculative_hit"] is False
+    assert retrieved[-1] == "What is the deadline for the internship report?"
+    assert result["source_documents"] == ["doc:What is the deadline for the internship report?"]
+    
+    print("4. Without history the raw question is used directly...")
+    pipeline, retrieved = make_pipeline("unused")
+    result = pipeline({"question": "What is this document about?", "chat_history": []})
+    assert result["speculative_hit"] is None
+    assert retrieved == ["What is this document about?"]
+    
+    print("5. A prefetched retrieval is consumed instead of starting a new one...")
+    pipeline, retrieved = make_pipeline("unused")
+    future = pipeline.prefetch("What is this document about?")
+    pipeline({"question": "What is this document about?", "chat_history": [], "prefetched": future})
+    assert retrieved == ["What is this document about?"]
+    
+    print("6. A failed prefetch is retrieved again on every attempt...")
+    pipeline, retrieved = make_pipeline("What are the requirements for the internship?")
+    failing = SpeculativeRetrievalPipeline(
+        condense=pipeline.condense, retrieve=lambda question, callbacks: 1 / 0, generate=pipeline.generate
+    )
+    future = failing.prefetch("What are the internship requirements?")
+    for history in ([], ["turn"], ["turn"]):
+        result = pipeline({"question": "What are the internship requirements?", "chat_history": history, "prefetched": future})
+        assert result["answer"].endswith("doc:" + result["generated_question"])
+    assert result["speculative_hit"] is False and len(retrieved) == 3
+    
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    test_retrieval_pipeline()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared state backends used by multi-worker deployments
+"""
+
+import sys
+import os
+import tempfile
+from multiprocessing import Pool
+
+# Add parent directory to path to import shared_state
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared_state import MemoryStateBackend, SQLiteStateBackend, create_state_backend
+
+def _increment(path):
+    backend = SQLiteStateBackend(path)
+    for _ in range(50):
+        backend.incr("agents:version")
+
+def check_backend(backend):
+    backend.set("cache:answer", {"text": "hi"})
+    assert backend.get("cache:answer") == {"text": "hi"}
+    assert backend.get("missing", "default") == "default"
+    backend.hset("agents", "handbook", {"pdf_path": "documents/handbook.pdf"})
+    assert backend.hgetall("agents") == {"handbook": {"pdf_path": "documents/handbook.pdf"}}
+    backend.hdel("agents", "handbook")
+    assert backend.hgetall("agents") == {}
+    backend.rpush("history:a", 1, 2)
+    backend.rpush("history:a", 3)
+    assert backend.lrange("history:a") == [1, 2, 3]
+    backend.delete("history:a")
+    assert backend.lrange("history:a") == []
+
+def test_shared_state():
+    """Test the backend API and cross-process visibility of the SQLite backend"""
+    
+    print("=== Shared State Test ===\n")
+    
+    print("1. Memory backend...")
+    check_backend(MemoryStateBackend())
+    assert isinstance(create_state_backend("memory://"), MemoryStateBackend)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.db")
+        
+        print("2. SQLite backend...")
+        check_backend(create_state_backend(f"sqlite:///{path}"))
+        
+        print("3. SQLite backend shared by 4 worker processes...")
+        with Pool(4) as pool:
+            pool.map(_increment, [path] * 4)
+        version = SQLiteStateBackend(path).get("agents:version")
+        print(f"   agents:version = {version}")
+        assert version == 200
+    
+    print("\n=== Test completed ===")
+
+if __name__ == "__main__":
+    test_shared_state()
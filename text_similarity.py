@@ -0,0 +1,31 @@
+"""
+Language-agnostic text similarity helpers shared by speculative retrieval,
+digest matching and extractive answers. Standard library only, and nothing
+runs at import time.
+"""
+
+import re
+
+_QUESTION_WORDS = re.compile(
+    r"\b(what|which|who|whom|whose|when|where|why|how|is|are|was|were|do|does|did|the|a|an|of|in|on|for|to)\b"
+)
+_WORD_SEPARATORS = re.compile(r"[\s?!.,;:]+")
+
+
+def trigrams(text):
+    """Character trigrams of the lowercased, whitespace-normalized text"""
+    text = " ".join(text.lower().split())
+    return {text[i:i + 3] for i in range(max(1, len(text) - 2))}
+
+
+def question_similarity(a, b):
+    """Character-trigram Jaccard similarity; language-agnostic (works for Thai without word breaks)"""
+    if a == b:
+        return 1.0
+    ta, tb = trigrams(a), trigrams(b)
+    return len(ta & tb) / len(ta | tb) if ta and tb else 0.0
+
+
+def content_words(text):
+    """Lowercased words without question words and articles (split on whitespace and punctuation only)"""
+    return [w for w in _WORD_SEPARATORS.split(_QUESTION_WORDS.sub(" ", text.lower())) if w]